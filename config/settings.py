@@ -1,23 +1,74 @@
 import os
+import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Shared HTTP transport settings for every Squidex call
+SQUIDEX_POOL_SIZE = int(os.getenv("SQUIDEX_HTTP_POOL_SIZE", "10"))
+# Refresh the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = int(os.getenv("SQUIDEX_TOKEN_REFRESH_MARGIN", "60"))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_squidex_session():
+    """
+    Get the shared, pooled HTTP session used for all Squidex requests
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_connections=SQUIDEX_POOL_SIZE, pool_maxsize=SQUIDEX_POOL_SIZE)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+class SquidexTokenProvider:
+    """
+    Caches the client-credentials access token and refreshes it once,
+    under a lock, shortly before its expires_in runs out
+    """
+    def __init__(self, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self.lock = threading.Lock()
+        self.token = None
+        self.expires_at = 0
+
+    def get_token(self):
+        with self.lock:
+            if self.token is None or time.monotonic() >= self.expires_at:
+                self._refresh()
+            return self.token
+
+    def _refresh(self):
+        url = f"{os.getenv('SQUIDEX_URL')}/identity-server/connect/token"
+        payload = {
+            "client_id": os.getenv("SQUIDEX_CLIENT_ID"),
+            "client_secret": os.getenv("SQUIDEX_CLIENT_SECRET"),
+            "grant_type": "client_credentials",
+            "scope": "squidex-api"
+        }
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+        response = get_squidex_session().post(url, data=payload, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+
+        self.token = data.get("access_token")
+        expires_in = data.get("expires_in", 3600)
+        self.expires_at = time.monotonic() + max(0, expires_in - self.refresh_margin)
+
+_token_provider = SquidexTokenProvider()
+
 def get_squidex_token():
-    url = f"{os.getenv('SQUIDEX_URL')}/identity-server/connect/token"
-    payload = {
-        "client_id": os.getenv("SQUIDEX_CLIENT_ID"),
-        "client_secret": os.getenv("SQUIDEX_CLIENT_SECRET"),
-        "grant_type": "client_credentials",
-        "scope": "squidex-api"
-    }
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
-    response = requests.post(url, data=payload, headers=headers)
-    response.raise_for_status()
-    return response.json().get("access_token")
+    return _token_provider.get_token()
 
 def get_headers(token):
     return {
@@ -1,14 +1,213 @@
 #!/usr/bin/env python3
 
 import os
+import click
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dotenv import load_dotenv
 from services.contentful_content import ContentfulContentService
+from services.contentful_schemas import ContentfulSchemasService
+from services.contentful_sync import ContentfulSyncService
 from services.mongodb import MongoDBService
+from services.content_pipeline import ContentMigrationPipeline
 from core.content_transformer import ContentTransformer
 
 load_dotenv()
 
-def migrate():
+SYNC_STATE_FILE = "output/sync/content_sync_token.json"
+
+def get_collection_name(content_type, content_type_info):
+    """
+    Collection name for a content type: its exact name, falling back to its ID
+    """
+    return (content_type_info or {}).get("name") or content_type
+
+def migrate_incremental(contentful_service, mongodb_service, transformer):
+    """
+    Apply only entries created, updated or deleted since the last sync
+    """
+    # The sync covers the whole space; only entry changes and deletions are applied here
+    sync_service = ContentfulSyncService(SYNC_STATE_FILE, item_types=("Entry", "DeletedEntry"))
+    
+    # Map content type IDs to collection names once, as the full migration does
+    content_types = ContentfulSchemasService().get_all_content_types()
+    collection_names = {
+        ct.get("sys", {}).get("id"): get_collection_name(ct.get("sys", {}).get("id"), ct)
+        for ct in content_types
+    }
+    
+    print("Loading asset mapping...")
+    asset_mapping = transformer.load_asset_mapping()
+    
+    upserted_entries = 0
+    failed_entries = 0
+    deleted_entry_ids = []
+    written_collections = set()
+    
+    for item in sync_service.iter_changes():
+        item_type = sync_service.get_item_type(item)
+        
+        if item_type == "Entry":
+            entry_info = contentful_service.extract_entry_info(item)
+            document = transformer.transform_content_for_mongodb(entry_info, asset_mapping) if entry_info else None
+            if not document:
+                failed_entries += 1
+                continue
+            
+            content_type = entry_info.get("content_type")
+            collection_name = collection_names.get(content_type) or content_type
+            if collection_name not in written_collections:
+                # The collection may be new to this run, so make sure its lookup indexes exist
+                create_content_indexes(mongodb_service, collection_name)
+            if mongodb_service.upsert_document(collection_name, document):
+                upserted_entries += 1
+                written_collections.add(collection_name)
+            else:
+                failed_entries += 1
+        
+        elif item_type == "DeletedEntry":
+            deleted_entry_ids.append(item.get("sys", {}).get("id"))
+    
+    # Deleted entries carry no content type, so remove them from every content collection
+    deleted_entries = 0
+    failed_deletes = 0
+    if deleted_entry_ids:
+        for collection_name in set(collection_names.values()):
+            deleted = mongodb_service.delete_documents(collection_name, {"_id": {"$in": deleted_entry_ids}})
+            if deleted is None:
+                failed_deletes += 1
+            else:
+                deleted_entries += deleted
+    
+    if failed_entries == 0 and failed_deletes == 0:
+        sync_service.save_sync_token()
+    else:
+        print("Sync token not saved because {} entries and {} collection deletes failed; the next run will retry them".format(
+            failed_entries, failed_deletes))
+    
+    # The summary is the run's manifest: which collections hold documents tagged with its run_id
+    mongodb_service.insert_document("migration_summary", {
+        "run_id": transformer.run_id,
+        "collections": sorted(written_collections),
+        "mode": "incremental",
+        "upserted_entries": upserted_entries,
+        "deleted_entries": deleted_entries,
+        "failed_entries": failed_entries,
+        "transformed_at": datetime.now().isoformat()
+    })
+    
+    print("Incremental content migration completed!")
+    print("Results: {} entries upserted, {} deleted, {} failed".format(
+        upserted_entries, deleted_entries, failed_entries))
+
+def create_content_indexes(mongodb_service, collection_name):
+    """
+    Create the lookup indexes every content collection gets
+    """
+    mongodb_service.create_index(collection_name, "migration_metadata.contentful_id")
+    mongodb_service.create_index(collection_name, "sys.content_type")
+    mongodb_service.create_index(collection_name, "sys.created_at")
+    # Lets delete_migrated_content.py --run-id remove one run's documents without a collection scan
+    mongodb_service.create_index(collection_name, "migration_metadata.run_id")
+
+def migrate_pipelined(contentful_service, mongodb_service, transformer, batch_size, workers=1, transform_processes=0):
+    """
+    Stream each content type page by page: extract -> transform -> bulk write,
+    with MongoDB writes overlapping the next Contentful fetch
+    """
+    print("Loading asset mapping...")
+    asset_mapping = transformer.load_asset_mapping()
+    
+    content_types = [
+        ct for ct in ContentfulSchemasService().get_all_content_types() if ct.get("sys", {}).get("id")
+    ]
+    print("Found {} content types to migrate".format(len(content_types)))
+    
+    pipeline = ContentMigrationPipeline(
+        contentful_service,
+        mongodb_service,
+        transformer,
+        asset_mapping=asset_mapping,
+        batch_size=batch_size,
+        transform_processes=transform_processes
+    )
+    
+    successful_migrations = 0
+    failed_migrations = 0
+    total_entries_migrated = 0
+    migrated_types = {}
+    written_collections = set()
+    
+    def migrate_content_type(content_type_info):
+        content_type = content_type_info.get("sys", {}).get("id")
+        collection_name = get_collection_name(content_type, content_type_info)
+        print("Migrating content type: {} into '{}'".format(content_type, collection_name))
+        
+        try:
+            stats = pipeline.migrate_content_type(content_type, collection_name, content_type_info)
+        except Exception as e:
+            print("Error migrating content type {}: {}".format(content_type, str(e)))
+            return content_type, None
+        
+        written = stats["inserted"] + stats["matched"]
+        if not stats["fetched"]:
+            print("No entries found for content type: {}".format(content_type))
+        elif written:
+            create_content_indexes(mongodb_service, collection_name)
+            print("Successfully migrated {} entries for content type {}".format(written, content_type))
+        else:
+            print("Failed to migrate content type: {}".format(content_type))
+        return content_type, stats
+    
+    # Each worker streams a whole content type; types have no dependencies on each other
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for content_type, stats in executor.map(migrate_content_type, content_types):
+                if stats is None:
+                    failed_migrations += 1
+                    continue
+                
+                migrated_types[content_type] = {"count": stats["transformed"]}
+                if stats["fetched"]:
+                    written_collections.add(stats["collection"])
+                written = stats["inserted"] + stats["matched"]
+                if written:
+                    successful_migrations += 1
+                    total_entries_migrated += written
+                elif stats["fetched"]:
+                    failed_migrations += 1
+    finally:
+        pipeline.close()
+    
+    summary = transformer.create_migration_summary(migrated_types)
+    mongodb_service.insert_document("migration_summary", {
+        **summary["migration_summary"],
+        "run_id": transformer.run_id,
+        "collections": sorted(written_collections),
+        "mode": "pipelined",
+        "successful_migrations": successful_migrations,
+        "failed_migrations": failed_migrations,
+        "total_entries_migrated": total_entries_migrated
+    })
+    
+    print("Content migration completed!")
+    print("Results: {}/{} content types successfully migrated".format(successful_migrations, len(migrated_types)))
+    print("Total entries migrated: {}".format(total_entries_migrated))
+    if failed_migrations > 0:
+        print("{} content types failed to migrate".format(failed_migrations))
+
+@click.command()
+@click.option("--incremental", is_flag=True,
+              help="Apply only changes since the last run using the Contentful Sync API")
+@click.option("--batch-size", default=1000, show_default=True,
+              help="Documents per bulk upsert request")
+@click.option("--pipelined", is_flag=True,
+              help="Process each Contentful page as it arrives instead of loading the whole space first")
+@click.option("--workers", default=1, show_default=True,
+              help="Content types fetched and written in parallel")
+@click.option("--transform-processes", default=0, show_default=True,
+              help="Processes that decode and transform pages with --pipelined (0 = in-process)")
+def migrate(incremental, batch_size, pipelined, workers, transform_processes):
     """
     Migrate content from Contentful to MongoDB
     """
@@ -18,6 +217,8 @@ def migrate():
     contentful_service = ContentfulContentService()
     mongodb_service = MongoDBService()
     transformer = ContentTransformer()
+    print("Run ID: {} (roll back with: python delete_migrated_content.py --run-id {})".format(
+        transformer.run_id, transformer.run_id))
     
     try:
         # Test MongoDB connection
@@ -26,13 +227,21 @@ def migrate():
             print("Cannot connect to MongoDB. Please check your connection string and credentials.")
             return
         
+        if incremental:
+            migrate_incremental(contentful_service, mongodb_service, transformer)
+            return
+        
+        if pipelined:
+            migrate_pipelined(contentful_service, mongodb_service, transformer, batch_size, workers, transform_processes)
+            return
+        
         # Load asset mapping if available (from S3 migration)
         print("Loading asset mapping...")
         asset_mapping = transformer.load_asset_mapping()
         
         # Fetch all content from Contentful grouped by content type
         print("Fetching content from Contentful...")
-        content_data = contentful_service.get_all_content_with_types(limit=100)
+        content_data = contentful_service.get_all_content_with_types(limit=100, max_workers=workers)
         
         if not content_data:
             print("No content found to migrate")
@@ -48,50 +257,56 @@ def migrate():
         successful_migrations = 0
         failed_migrations = 0
         total_entries_migrated = 0
+        written_collections = set()
         
-        for content_type, type_data in transformed_data.items():
+        def load_content_type(item):
+            content_type, type_data = item
             print("Migrating content type: {}".format(content_type))
             
+            if type_data.get("fetch_error"):
+                print("Failed to fetch entries for content type {}: {}".format(content_type, type_data["fetch_error"]))
+                return "failed", 0, None
+            
             entries = type_data.get("entries", [])
             if not entries:
                 print("No entries found for content type: {}".format(content_type))
-                continue
-            
-            # Get content type info to extract the name
-            content_type_info = type_data.get("content_type_info", {})
-            content_type_name = content_type_info.get("name", content_type)  # Fallback to ID if name not found
+                return "empty", 0, None
             
             # Use the exact content type name as collection name (MongoDB supports spaces and special characters)
-            collection_name = content_type_name
-            
-            # Ensure name is not empty (fallback to content type ID if needed)
-            if not collection_name:
-                collection_name = content_type
+            collection_name = get_collection_name(content_type, type_data.get("content_type_info"))
             
             print("Using collection name: '{}' (exact content type name)".format(collection_name))
             
             try:
-                # Insert all entries for this content type
-                inserted_ids = mongodb_service.insert_documents(collection_name, entries)
+                # Upsert all entries for this content type, so reruns replace instead of failing on duplicate _id
+                result = mongodb_service.bulk_upsert_documents(collection_name, entries, batch_size)
+                written = result["inserted"] + result["matched"]
                 
-                if inserted_ids:
-                    successful_migrations += 1
-                    total_entries_migrated += len(inserted_ids)
-                    print("Successfully migrated {} entries for content type {}".format(
-                        len(inserted_ids), content_type))
+                if written:
+                    print("Successfully migrated {} entries for content type {} ({} new, {} updated, {} failed)".format(
+                        written, content_type, result["inserted"], result["modified"], result["failed"]))
                     
                     # Create indexes for better performance
-                    mongodb_service.create_index(collection_name, "migration_metadata.contentful_id")
-                    mongodb_service.create_index(collection_name, "sys.content_type")
-                    mongodb_service.create_index(collection_name, "sys.created_at")
-                    
-                else:
-                    failed_migrations += 1
-                    print("Failed to migrate content type: {}".format(content_type))
-                    
+                    create_content_indexes(mongodb_service, collection_name)
+                    return "success", written, collection_name
+                
+                print("Failed to migrate content type: {}".format(content_type))
+                return "failed", 0, collection_name
+                
             except Exception as e:
-                failed_migrations += 1
                 print("Error migrating content type {}: {}".format(content_type, str(e)))
+                return "failed", 0, collection_name
+        
+        # Content types are independent, so they can be written in parallel
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for status, written, collection_name in executor.map(load_content_type, transformed_data.items()):
+                if collection_name:
+                    written_collections.add(collection_name)
+                if status == "success":
+                    successful_migrations += 1
+                    total_entries_migrated += written
+                elif status == "failed":
+                    failed_migrations += 1
         
         # Create migration summary
         summary = transformer.create_migration_summary(transformed_data)
@@ -99,6 +314,8 @@ def migrate():
         # Store migration summary in a special collection
         summary_doc = {
             **summary["migration_summary"],
+            "run_id": transformer.run_id,
+            "collections": sorted(written_collections),
             "successful_migrations": successful_migrations,
             "failed_migrations": failed_migrations,
             "total_entries_migrated": total_entries_migrated
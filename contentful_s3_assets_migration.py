@@ -1,23 +1,150 @@
 #!/usr/bin/env python3
 
 import os
+import click
 from dotenv import load_dotenv
 from services.contentful_assets import ContentfulAssetsService
+from services.contentful_sync import ContentfulSyncService
 from services.aws_s3 import S3AssetService
+from services.asset_pipeline import AssetMigrationPipeline
 from core.asset_transformer import AssetTransformer
 
 load_dotenv()
 
-def migrate():
+SYNC_STATE_FILE = "output/sync/assets_sync_token.json"
+
+def migrate_incremental(contentful_service, s3_service, transformer, upload_asset):
+    """
+    Apply only assets created, updated or deleted since the last sync
+    """
+    # The sync covers the whole space; only asset changes and deletions are applied here
+    sync_service = ContentfulSyncService(SYNC_STATE_FILE, item_types=("Asset", "DeletedAsset"))
+    
+    # The mapping tells us which S3 key each asset was stored under, so
+    # renamed and deleted assets can be cleaned up
+    asset_mapping = transformer.open_asset_mapping_store()
+    
+    uploaded_assets = 0
+    deleted_assets = 0
+    failed_assets = 0
+    
+    for item in sync_service.iter_changes():
+        item_type = sync_service.get_item_type(item)
+        asset_id = item.get("sys", {}).get("id")
+        previous = asset_mapping.get(asset_id)
+        
+        if item_type == "Asset":
+            asset_info = contentful_service.extract_file_info(item)
+            s3_result = upload_asset(asset_info) if asset_info else None
+            if not s3_result:
+                failed_assets += 1
+                continue
+            
+            if previous and previous.get("s3_key") and previous["s3_key"] != s3_result["s3_key"]:
+                s3_service.delete_asset_from_s3(previous["s3_key"])
+            
+            asset_mapping.merge(asset_id, s3_result)
+            uploaded_assets += 1
+        
+        elif item_type == "DeletedAsset":
+            if previous:
+                # Keep the mapping when the S3 delete fails, so the next run retries it
+                if previous.get("s3_key") and not s3_service.delete_asset_from_s3(previous["s3_key"]):
+                    failed_assets += 1
+                    continue
+                del asset_mapping[asset_id]
+                deleted_assets += 1
+            else:
+                print("Deleted asset {} not found in asset mapping, skipping".format(asset_id))
+    
+    asset_mapping.close()
+    
+    if failed_assets == 0:
+        sync_service.save_sync_token()
+    else:
+        print("Sync token not saved because {} assets failed; the next run will retry them".format(failed_assets))
+    
+    print("Incremental asset migration completed!")
+    print("Results: {} assets uploaded, {} deleted, {} failed".format(uploaded_assets, deleted_assets, failed_assets))
+
+def migrate_with_pipeline(contentful_service, s3_service, transformer, download_workers, upload_workers,
+                          queue_size, content_addressed, skip_existing=False):
+    """
+    Migrate every asset through the staged asyncio download/upload pipeline
+    """
+    if skip_existing and not content_addressed:
+        # One listing of the prefix replaces a request per asset
+        s3_service.build_bucket_index()
+    
+    asset_mapping = transformer.open_asset_mapping_store()
+    asset_data = []
+    
+    def record_result(asset_info, s3_result):
+        if s3_result:
+            asset_mapping.merge(asset_info.get("asset_id"), s3_result)
+            print("Successfully migrated: {}".format(asset_info.get('filename')))
+        else:
+            print("Failed to migrate: {}".format(asset_info.get('filename')))
+        asset_data.append(transformer.transform_asset_for_output(asset_info, s3_result))
+    
+    pipeline = AssetMigrationPipeline(
+        contentful_service,
+        s3_service,
+        download_workers=download_workers,
+        upload_workers=upload_workers,
+        queue_size=queue_size,
+        content_addressed=content_addressed,
+        skip_existing=skip_existing
+    )
+    results = pipeline.run(on_result=record_result)
+    
+    successful_uploads = sum(1 for _, s3_result in results if s3_result)
+    failed_uploads = len(results) - successful_uploads
+    summary = transformer.create_migration_summary(len(results), successful_uploads, failed_uploads)
+    
+    print("Asset migration completed!")
+    print("Results: {}/{} assets successfully migrated ({})".format(
+        successful_uploads, len(results), summary["migration_summary"]["success_rate"]))
+    if failed_uploads > 0:
+        print("{} assets failed to migrate".format(failed_uploads))
+    
+    asset_mapping.close()
+    transformer.save_migration_report({**summary, "assets": asset_data})
+
+@click.command()
+@click.option("--incremental", is_flag=True,
+              help="Apply only changes since the last run using the Contentful Sync API")
+@click.option("--stream", is_flag=True,
+              help="Stream asset bytes straight into S3 instead of buffering whole files")
+@click.option("--workers", default=1, show_default=True,
+              help="Number of assets transferred concurrently")
+@click.option("--skip-existing", is_flag=True,
+              help="Skip assets already in S3 with the same size and no newer Contentful update")
+@click.option("--content-addressed", is_flag=True,
+              help="Store each file once under the SHA-256 of its bytes")
+@click.option("--pipeline", is_flag=True,
+              help="Migrate all assets through the asyncio list/download/upload pipeline")
+@click.option("--download-workers", default=4, show_default=True, help="Concurrent downloads in --pipeline mode")
+@click.option("--upload-workers", default=4, show_default=True, help="Concurrent uploads in --pipeline mode")
+@click.option("--queue-size", default=16, show_default=True,
+              help="Bounded queue size between --pipeline stages")
+def migrate(incremental, stream, workers, skip_existing, content_addressed, pipeline, download_workers,
+            upload_workers, queue_size):
     """
     Migrate assets from Contentful to AWS S3
     """
+    if pipeline and stream:
+        raise click.UsageError("--stream can't be combined with --pipeline, which always spools downloads")
+    if pipeline and workers != 1:
+        raise click.UsageError("--workers has no effect with --pipeline; use --download-workers and --upload-workers")
+    
     print("Starting Contentful to S3 asset migration")
     
     # Initialize services
     contentful_service = ContentfulAssetsService()
     s3_service = S3AssetService()
     transformer = AssetTransformer()
+    upload_asset = s3_service.get_upload_method(stream, content_addressed)
     
     try:
         # Check S3 bucket accessibility first
@@ -26,6 +153,16 @@ def migrate():
             print("Cannot access S3 bucket. Please check your AWS credentials and bucket configuration.")
             return
         
+        if incremental:
+            migrate_incremental(contentful_service, s3_service, transformer, upload_asset)
+            return
+        
+        if pipeline:
+            migrate_with_pipeline(contentful_service, s3_service, transformer, download_workers,
+                                  upload_workers, queue_size, content_addressed, skip_existing)
+            print("Migration complete.")
+            return
+        
         # Fetch assets from Contentful (limit to 100)
         print("Fetching assets from Contentful...")
         raw_assets, total = contentful_service.get_assets_batch(limit=100, skip=0)
@@ -43,20 +180,31 @@ def migrate():
         
         print("Found {} assets to process".format(len(assets)))
         
+        if skip_existing:
+            # One listing of the prefix replaces a request per asset
+            s3_service.build_bucket_index()
+        
         # Process asset information
         print("Processing assets...")
         asset_data = []
         successful_uploads = 0
         failed_uploads = 0
+        skipped_uploads = 0
+        asset_mapping = transformer.open_asset_mapping_store()
         
-        for asset_info in assets:
-            print("Processing asset: {} (ID: {})".format(
-                asset_info.get('filename'), asset_info.get('asset_id')))
-            
-            # Upload to S3
-            s3_result = s3_service.upload_asset_to_s3(asset_info)
-            
+        def record_mapping(asset_info, s3_result):
+            # Persist asset ID -> S3 key (the digest key in content-addressed mode) as each upload finishes,
+            # keeping fields other migrations recorded (e.g. the Squidex asset ID)
             if s3_result:
+                asset_mapping.merge(asset_info.get("asset_id"), s3_result)
+        
+        for asset_info, s3_result in s3_service.upload_assets_concurrently(
+                assets, workers, stream, skip_existing, content_addressed, on_result=record_mapping):
+            if s3_result and s3_result.get("skipped"):
+                successful_uploads += 1
+                skipped_uploads += 1
+                transformed = transformer.transform_asset_for_output(asset_info, s3_result)
+            elif s3_result:
                 successful_uploads += 1
                 transformed = transformer.transform_asset_for_output(asset_info, s3_result)
                 print("Successfully migrated: {}".format(asset_info.get('filename')))
@@ -69,11 +217,18 @@ def migrate():
         
         # Show final results
         total_assets = len(assets)
+        summary = transformer.create_migration_summary(total_assets, successful_uploads, failed_uploads)
         print("Asset migration completed!")
-        print("Results: {}/{} assets successfully migrated".format(successful_uploads, total_assets))
+        print("Results: {}/{} assets successfully migrated ({})".format(
+            successful_uploads, total_assets, summary["migration_summary"]["success_rate"]))
+        if skipped_uploads > 0:
+            print("{} unchanged assets were already in S3 and skipped".format(skipped_uploads))
         if failed_uploads > 0:
             print("{} assets failed to migrate".format(failed_uploads))
         
+        asset_mapping.close()
+        transformer.save_migration_report({**summary, "assets": asset_data})
+        
         print("Migration complete.")
             
     except Exception as e:
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import click
+from dotenv import load_dotenv
+from services.contentful_assets import ContentfulAssetsService
+from services.squidex_assets import SquidexAssetUploader
+from core.asset_transformer import AssetTransformer
+
+load_dotenv()
+
+@click.command()
+@click.option("--workers", default=4, show_default=True,
+              help="Assets streamed into Squidex concurrently")
+def migrate(workers):
+    """
+    Migrate assets from Contentful into the Squidex asset store
+    """
+    print("Starting Contentful to Squidex asset migration")
+
+    contentful_service = ContentfulAssetsService()
+    uploader = SquidexAssetUploader(max_workers=workers)
+    asset_mapping = AssetTransformer().open_asset_mapping_store()
+
+    def record_mapping(asset_info, squidex_result):
+        # Add the Squidex asset ID to the asset's mapping record as each upload finishes
+        if squidex_result:
+            asset_mapping.merge(asset_info.get("asset_id"), squidex_result)
+            print("Successfully uploaded: {}".format(asset_info.get("filename")))
+        else:
+            print("Failed to upload: {}".format(asset_info.get("filename")))
+
+    try:
+        succeeded, failed = uploader.upload_assets_concurrently(
+            contentful_service.iter_processed_assets(), on_result=record_mapping
+        )
+    finally:
+        asset_mapping.close()
+
+    print("Asset migration completed!")
+    print("Results: {}/{} assets uploaded to Squidex".format(succeeded, succeeded + failed))
+    if failed > 0:
+        print("{} assets failed to upload".format(failed))
+
+if __name__ == "__main__":
+    migrate()
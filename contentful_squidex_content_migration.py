@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import click
+from dotenv import load_dotenv
+from services.contentful_content import ContentfulContentService
+from services.squidex_content import SquidexContentLoader
+from core.content_transformer import ContentTransformer
+
+load_dotenv()
+
+@click.command()
+@click.option("--batch-size", default=100, show_default=True,
+              help="Entries per bulk request")
+@click.option("--workers", default=4, show_default=True,
+              help="Bulk requests in flight at once")
+@click.option("--publish/--no-publish", default=True, show_default=True,
+              help="Publish entries as they are upserted")
+def migrate(batch_size, workers, publish):
+    """
+    Migrate content entries from Contentful into Squidex schemas
+    """
+    print("Starting Contentful to Squidex content migration")
+
+    contentful_service = ContentfulContentService()
+    # Asset references resolve to the Squidex asset IDs recorded by the Squidex asset migration
+    asset_mapping = ContentTransformer().load_asset_mapping()
+    loader = SquidexContentLoader(batch_size=batch_size, max_workers=workers, publish=publish,
+                                  asset_mapping=asset_mapping)
+
+    total_loaded = 0
+    total_failed = 0
+    content_type_count = 0
+
+    # Entries stream in page by page and go out in bulk batches
+    for content_type, content_type_info, entries in contentful_service.iter_content_with_types():
+        content_type_count += 1
+        print(f"Loading content type: {content_type}")
+        result = loader.load_entries(content_type_info, entries)
+        total_loaded += result["succeeded"]
+        total_failed += result["failed"]
+        print(f"✅ {content_type}: {result['succeeded']} entries loaded in {result['batches']} batches ({result['failed']} failed)")
+
+    print("Content migration completed!")
+    print(f"Content types processed: {content_type_count}")
+    print(f"Total entries loaded: {total_loaded}")
+    if total_failed:
+        print(f"{total_failed} entries failed to load")
+
+if __name__ == "__main__":
+    migrate()
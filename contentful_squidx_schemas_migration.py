@@ -2,36 +2,102 @@
 
 import os
 import click
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from core.transformer import transform_content_type
-from services.squidex import push_schema_to_squidex, get_schema_id_map
+from core.schema_graph import topological_levels
+from core.transformer import transform_content_type, get_schema_name, get_referenced_schema_names
+from services.squidex import (
+    push_schema_to_squidex, sync_schema_to_squidex, get_schema_id_map,
+    compute_schema_hash, load_schema_state, save_schema_state
+)
 from services.contentful import get_all_content_types
 
 load_dotenv()
 
+def push_if_changed(schema, stage, schema_state, schema_id_map, force=False, push=push_schema_to_squidex):
+    """
+    Push a schema unless the same definition was already pushed for this stage
+    and the schema still exists in Squidex. Records the hash after a successful push.
+    Returns (sent, schema_id); schema_id is None if the push failed.
+    """
+    name = schema.get("name")
+    schema_hash = compute_schema_hash(schema)
+    pushed = schema_state.setdefault(name, {})
+
+    if not force and pushed.get(stage) == schema_hash and name in schema_id_map:
+        print(f"⏭️ Schema unchanged: {name} ({stage}) → Skipping")
+        return False, schema_id_map[name]
+
+    schema_id = push(schema)
+    if schema_id:
+        pushed[stage] = schema_hash
+    else:
+        pushed.pop(stage, None)
+    return True, schema_id
+
+def push_level(content_types, stage, schema_state, schema_id_map, executor, force, push):
+    """
+    Push a set of mutually independent schemas concurrently, resolving references
+    against the IDs known so far, and record the returned IDs.
+    Returns the number of pushes sent.
+    """
+    def push_content_type(ct):
+        print(f"Processing content type: {ct.get('name', 'Unknown')}")
+        schema = transform_content_type(ct, schema_id_map, resolve_references=True)
+        return schema["name"], push_if_changed(schema, stage, schema_state, schema_id_map, force, push)
+
+    sent_count = 0
+    for name, (sent, schema_id) in executor.map(push_content_type, content_types):
+        sent_count += sent
+        if schema_id:
+            schema_id_map[name] = schema_id
+    return sent_count
+
 @click.command()
-def migrate():
+@click.option("--force", is_flag=True,
+              help="Push every schema even if it is unchanged since the last run")
+@click.option("--sync", is_flag=True,
+              help="Apply each schema with one call to the Squidex synchronize endpoint")
+@click.option("--workers", default=4, show_default=True,
+              help="Independent schemas pushed in parallel")
+def migrate(force, sync, workers):
     content_types = get_all_content_types()
-    transformed_schemas = []
+    schema_state = load_schema_state()
+    pushed_count = 0
+    push = sync_schema_to_squidex if sync else push_schema_to_squidex
 
     print(f"Found {len(content_types)} content types in Contentful")
-    
+
+    # Listed once; IDs of created schemas are taken from the push responses
     schema_id_map = get_schema_id_map()
 
-    for ct in content_types:
-        print(f"Processing content type: {ct.get('name', 'Unknown')}")
-        schema = transform_content_type(ct, schema_id_map, resolve_references=False)
-        transformed_schemas.append((ct, schema))
-        push_schema_to_squidex(schema)
+    # Referenced schemas are pushed before the schemas that reference them,
+    # so their IDs are known when references are resolved
+    content_types_by_name = {get_schema_name(ct): ct for ct in content_types}
+    levels, cyclic = topological_levels({
+        name: get_referenced_schema_names(ct) for name, ct in content_types_by_name.items()
+    })
+    print(f"Pushing {len(content_types_by_name) - len(cyclic)} schemas in {len(levels)} dependency levels")
 
-    schema_id_map = get_schema_id_map()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for level in levels:
+                level_types = [content_types_by_name[name] for name in level]
+                pushed_count += push_level(level_types, "resolved", schema_state, schema_id_map, executor, force, push)
 
-    for ct, _ in transformed_schemas:
-        print(f"Processing references for: {ct.get('name', 'Unknown')}")
-        schema = transform_content_type(ct, schema_id_map, resolve_references=True)
-        push_schema_to_squidex(schema)
+            if cyclic:
+                # Schemas in reference cycles: create the missing ones with the references
+                # resolvable so far, then update all of them once every ID is known
+                print(f"Resolving {len(cyclic)} schemas with circular references")
+                missing = [content_types_by_name[name] for name in cyclic if name not in schema_id_map]
+                pushed_count += push_level(missing, "base", schema_state, schema_id_map, executor, force, push)
+
+                cyclic_types = [content_types_by_name[name] for name in cyclic]
+                pushed_count += push_level(cyclic_types, "resolved", schema_state, schema_id_map, executor, force, push)
+    finally:
+        save_schema_state(schema_state)
 
-    print("Migration complete - all schemas pushed to Squidex.")
+    print(f"Migration complete - {pushed_count} schema pushes sent to Squidex.")
 
 if __name__ == "__main__":
     migrate()
@@ -0,0 +1,116 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = "output/assets/asset_mapping.sqlite"
+
+class AssetMappingStore:
+    """
+    Persistent, indexed asset ID -> migration record store backed by SQLite.
+    Records are written as each upload finishes, so a crash mid-run keeps
+    everything migrated so far, and lookups go through the primary key index
+    instead of loading the whole mapping into memory. Supports the dict
+    operations ContentTransformer uses (get, in, []), so it can be passed
+    wherever an asset mapping dict is expected.
+    """
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS asset_mapping (asset_id TEXT PRIMARY KEY, record TEXT NOT NULL)"
+        )
+        self.connection.commit()
+    
+    def get(self, asset_id, default=None):
+        """
+        Look up the record for one asset
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT record FROM asset_mapping WHERE asset_id = ?", (asset_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+    
+    def put(self, asset_id, record):
+        """
+        Insert or replace the record for one asset and commit immediately
+        """
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO asset_mapping (asset_id, record) VALUES (?, ?)",
+                (asset_id, json.dumps(record, default=str))
+            )
+            self.connection.commit()
+    
+    def merge(self, asset_id, values):
+        """
+        Update some fields of an asset's record, keeping the others, e.g. adding the
+        Squidex asset ID to an S3 record. Creates the record if it doesn't exist.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT record FROM asset_mapping WHERE asset_id = ?", (asset_id,)
+            ).fetchone()
+            record = json.loads(row[0]) if row else {}
+            record.update(values)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO asset_mapping (asset_id, record) VALUES (?, ?)",
+                (asset_id, json.dumps(record, default=str))
+            )
+            self.connection.commit()
+        return record
+    
+    def delete(self, asset_id):
+        """
+        Remove the record for one asset
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM asset_mapping WHERE asset_id = ?", (asset_id,))
+            self.connection.commit()
+    
+    def import_mapping(self, asset_mapping):
+        """
+        Bulk load an existing {asset_id: record} mapping, e.g. a legacy JSON file
+        """
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO asset_mapping (asset_id, record) VALUES (?, ?)",
+                ((asset_id, json.dumps(record, default=str)) for asset_id, record in asset_mapping.items())
+            )
+            self.connection.commit()
+        logger.info(f"Imported {len(asset_mapping)} asset mappings into {self.path}")
+    
+    def close(self):
+        """
+        Close the underlying SQLite connection
+        """
+        with self.lock:
+            self.connection.close()
+    
+    def __contains__(self, asset_id):
+        return self.get(asset_id) is not None
+    
+    def __getitem__(self, asset_id):
+        record = self.get(asset_id)
+        if record is None:
+            raise KeyError(asset_id)
+        return record
+    
+    def __setitem__(self, asset_id, record):
+        self.put(asset_id, record)
+    
+    def __delitem__(self, asset_id):
+        self.delete(asset_id)
+    
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM asset_mapping").fetchone()[0]
@@ -1,6 +1,8 @@
 import json
 import logging
+import os
 from datetime import datetime
+from core.asset_mapping_store import AssetMappingStore, DEFAULT_STORE_PATH
 
 logger = logging.getLogger(__name__)
 
@@ -62,11 +64,37 @@ class AssetTransformer:
         
         return summary
     
+    def load_asset_mapping(self, mapping_path="output/assets/asset_mapping.json"):
+        """
+        Load a previously saved asset mapping, or an empty one if none exists
+        """
+        try:
+            with open(mapping_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading asset mapping: {str(e)}")
+            return {}
+    
+    def open_asset_mapping_store(self, store_path=DEFAULT_STORE_PATH,
+                                 legacy_path="output/assets/asset_mapping.json"):
+        """
+        Open the persistent asset mapping store, importing a legacy JSON mapping once if the store is empty
+        """
+        store = AssetMappingStore(store_path)
+        if len(store) == 0:
+            legacy_mapping = self.load_asset_mapping(legacy_path)
+            if legacy_mapping:
+                store.import_mapping(legacy_mapping)
+        return store
+    
     def save_asset_mapping(self, asset_mappings, output_path="output/assets/asset_mapping.json"):
         """
         Save asset mapping to JSON file
         """
         try:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
             with open(output_path, 'w') as f:
                 json.dump(asset_mappings, f, indent=2)
             logger.info(f"Asset mapping saved to {output_path}")
@@ -78,6 +106,7 @@ class AssetTransformer:
         Save detailed migration report
         """
         try:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
             with open(output_path, 'w') as f:
                 json.dump(migration_data, f, indent=2)
             logger.info(f"Migration report saved to {output_path}")
@@ -0,0 +1,19 @@
+from collections import deque
+from itertools import islice
+
+def iter_window(executor, fn, items, window):
+    """
+    Run fn(item) on the executor for each item with at most `window` calls in
+    flight, and yield the results in item order. Items are consumed lazily: the
+    next one is pulled only when an earlier result is handed out, so a large or
+    streamed input never holds more than `window` items at once.
+    """
+    items = iter(items)
+    in_flight = deque(executor.submit(fn, item) for item in islice(items, max(1, window)))
+
+    while in_flight:
+        result = in_flight.popleft().result()
+        # Refill before yielding, so the window stays full while the caller works
+        for item in islice(items, 1):
+            in_flight.append(executor.submit(fn, item))
+        yield result
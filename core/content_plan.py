@@ -0,0 +1,69 @@
+PREFERRED_LOCALES = ("en-US", "en", "en-GB")
+
+# Field kinds a plan can assign
+VALUE = "value"
+LINK = "link"
+LINK_ARRAY = "link_array"
+RICH_TEXT = "rich_text"
+
+class ContentTypePlan:
+    """
+    Per-content-type transform plan compiled from a Contentful content type definition.
+    Records which fields are single links, arrays of links or rich text. With it,
+    links are resolved directly and rich text documents and scalars skip the
+    recursive walk. Object and value-array fields, and fields missing from the
+    definition, still take the generic recursive path. Locale maps are still
+    detected per value, as the generic path does.
+    """
+    def __init__(self, content_type_info):
+        self.content_type = content_type_info.get("sys", {}).get("id")
+        self.field_kinds = {}
+
+        for field in content_type_info.get("fields", []):
+            field_id = field.get("id")
+            if field_id:
+                self.field_kinds[field_id] = self._classify_field(field)
+
+    @staticmethod
+    def _classify_field(field):
+        field_type = field.get("type")
+        if field_type == "Link":
+            return LINK
+        if field_type == "Array" and field.get("items", {}).get("type") == "Link":
+            return LINK_ARRAY
+        if field_type == "RichText":
+            return RICH_TEXT
+        return VALUE
+
+    def get_field_kind(self, field_id):
+        """
+        Kind of a field, or None if the definition does not declare it
+        """
+        return self.field_kinds.get(field_id)
+
+def is_locale_map(value):
+    """
+    Whether a value is a {locale: value} map holding one of the preferred locales.
+    Maps with only other locales are kept as-is, like the generic path does.
+    """
+    return isinstance(value, dict) and any(locale in value for locale in PREFERRED_LOCALES)
+
+def select_locale(localized_value):
+    """
+    Pick the value for the preferred locale from a CMA {locale: value} map,
+    falling back to the first available locale
+    """
+    for locale in PREFERRED_LOCALES:
+        if locale in localized_value:
+            return localized_value[locale]
+    for value in localized_value.values():
+        return value
+    return None
+
+def compile_transform_plan(content_type_info):
+    """
+    Compile the transform plan for a content type definition
+    """
+    if not content_type_info:
+        return None
+    return ContentTypePlan(content_type_info)
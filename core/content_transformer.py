@@ -1,13 +1,19 @@
 import json
+import os
+import uuid
 from datetime import datetime
+from core.asset_mapping_store import AssetMappingStore, DEFAULT_STORE_PATH
+from core.content_plan import LINK, LINK_ARRAY, RICH_TEXT, compile_transform_plan
 
 class ContentTransformer:
-    def __init__(self):
-        pass
+    def __init__(self, run_id=None):
+        # Tags every document this migration run writes, so the run can be rolled back on its own
+        self.run_id = run_id or "{}-{}".format(datetime.now().strftime("%Y%m%dT%H%M%S"), uuid.uuid4().hex[:8])
     
-    def transform_content_for_mongodb(self, entry_info, asset_mapping=None):
+    def transform_content_for_mongodb(self, entry_info, asset_mapping=None, plan=None):
         """
-        Transform Contentful entry for MongoDB storage
+        Transform Contentful entry for MongoDB storage.
+        With a ContentTypePlan, only the declared link fields are resolved.
         """
         try:
             transformed = {
@@ -15,6 +21,7 @@ class ContentTransformer:
                 "_id": entry_info.get("contentful_id"),  # Use Contentful ID as MongoDB _id
                 "migration_metadata": {
                     "source": "contentful",
+                    "run_id": self.run_id,
                     "migrated_at": datetime.now().isoformat(),
                     "content_type": entry_info.get("content_type"),
                     "contentful_id": entry_info.get("contentful_id"),
@@ -31,7 +38,7 @@ class ContentTransformer:
                 },
                 
                 # Content fields
-                "fields": self._process_fields_for_mongodb(entry_info.get("fields", {}), asset_mapping)
+                "fields": self._process_fields_for_mongodb(entry_info.get("fields", {}), asset_mapping, plan)
             }
             
             return transformed
@@ -40,14 +47,26 @@ class ContentTransformer:
             print("Error transforming content for MongoDB: {}".format(str(e)))
             return None
     
-    def _process_fields_for_mongodb(self, fields, asset_mapping=None):
+    def _process_fields_for_mongodb(self, fields, asset_mapping=None, plan=None):
         """
         Process content fields, replacing asset references with S3 URLs
         """
         processed_fields = {}
         
         for field_name, field_value in fields.items():
-            processed_fields[field_name] = self._process_field_value_for_mongodb(field_value, asset_mapping)
+            field_kind = plan.get_field_kind(field_name) if plan else None
+            if field_kind is None:
+                processed_fields[field_name] = self._process_field_value_for_mongodb(field_value, asset_mapping)
+            elif field_kind == LINK:
+                processed_fields[field_name] = self._resolve_reference(field_value, asset_mapping)
+            elif field_kind == LINK_ARRAY and isinstance(field_value, list):
+                processed_fields[field_name] = [self._resolve_reference(item, asset_mapping) for item in field_value]
+            elif field_kind != RICH_TEXT and isinstance(field_value, (dict, list)):
+                # JSON objects and arrays can still hold reference dicts
+                processed_fields[field_name] = self._process_field_value_for_mongodb(field_value, asset_mapping)
+            else:
+                # Scalars and rich text: nothing to resolve
+                processed_fields[field_name] = field_value
         
         return processed_fields
     
@@ -77,21 +96,34 @@ class ContentTransformer:
         else:
             return field_value
     
+    def _resolve_reference(self, reference, asset_mapping=None):
+        """
+        Resolve a processed reference from a declared link field
+        """
+        if isinstance(reference, dict) and reference.get("type") == "reference":
+            if reference.get("link_type") == "Asset":
+                return self._resolve_asset_reference(reference, asset_mapping)
+            if reference.get("link_type") == "Entry":
+                return self._resolve_entry_reference(reference)
+        return reference
+    
     def _resolve_asset_reference(self, asset_ref, asset_mapping=None):
         """
         Resolve asset reference to S3 URL if available
         """
         contentful_asset_id = asset_ref.get("contentful_id")
         
-        # If we have asset mapping (from S3 migration), use S3 URL
-        if asset_mapping and contentful_asset_id in asset_mapping:
-            asset_info = asset_mapping[contentful_asset_id]
+        # If we have asset mapping (from S3 migration), use S3 URL.
+        # A single get() keeps this to one indexed lookup for AssetMappingStore.
+        asset_info = asset_mapping.get(contentful_asset_id) if asset_mapping is not None else None
+        if asset_info:
             return {
                 "type": "asset",
                 "contentful_id": contentful_asset_id,
                 "s3_url": asset_info.get("s3_url"),
                 "s3_key": asset_info.get("s3_key"),
-                "original_url": asset_info.get("original_url")
+                "original_url": asset_info.get("original_url"),
+                "squidex_asset_id": asset_info.get("squidex_asset_id")
             }
         
         # Otherwise, keep the reference as-is
@@ -122,9 +154,10 @@ class ContentTransformer:
             
             transformed_entries = []
             entries = type_data.get("entries", [])
+            plan = compile_transform_plan(type_data.get("content_type_info"))
             
             for entry in entries:
-                transformed_entry = self.transform_content_for_mongodb(entry, asset_mapping)
+                transformed_entry = self.transform_content_for_mongodb(entry, asset_mapping, plan)
                 if transformed_entry:
                     transformed_entries.append(transformed_entry)
             
@@ -133,15 +166,23 @@ class ContentTransformer:
                 "entries": transformed_entries,
                 "count": len(transformed_entries)
             }
+            if type_data.get("fetch_error"):
+                transformed_by_type[content_type]["fetch_error"] = type_data["fetch_error"]
             
             print("Transformed {} entries for content type {}".format(len(transformed_entries), content_type))
         
         return transformed_by_type
     
-    def load_asset_mapping(self, mapping_file="output/assets/asset_mapping.json"):
+    def load_asset_mapping(self, mapping_file="output/assets/asset_mapping.json", store_path=DEFAULT_STORE_PATH):
         """
-        Load asset mapping from S3 migration
+        Load asset mapping from S3 migration.
+        Prefers the indexed mapping store, which is queried per lookup instead of loaded into memory.
         """
+        if os.path.exists(store_path):
+            asset_mapping = AssetMappingStore(store_path)
+            print("Using asset mapping store {} with {} assets".format(store_path, len(asset_mapping)))
+            return asset_mapping
+        
         try:
             with open(mapping_file, 'r') as f:
                 asset_mapping = json.load(f)
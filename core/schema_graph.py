@@ -0,0 +1,25 @@
+def topological_levels(dependencies):
+    """
+    Group nodes into levels so every node comes after the nodes it depends on.
+    dependencies maps each node to the nodes it depends on; unknown nodes are ignored.
+    Nodes within a level are independent of each other.
+    Returns (levels, cyclic) where cyclic holds the nodes that are part of,
+    or depend on, a cycle and so can't be ordered.
+    """
+    remaining = {
+        node: {dependency for dependency in node_dependencies if dependency in dependencies}
+        for node, node_dependencies in dependencies.items()
+    }
+    levels = []
+
+    while remaining:
+        level = sorted(node for node, node_dependencies in remaining.items() if not node_dependencies)
+        if not level:
+            break
+        levels.append(level)
+        for node in level:
+            del remaining[node]
+        for node_dependencies in remaining.values():
+            node_dependencies.difference_update(level)
+
+    return levels, sorted(remaining)
@@ -1,5 +1,8 @@
 import re
 
+# Marks the schemas created from Contentful content types, so they can be told apart from hand-made ones
+MIGRATED_SCHEMA_TAG = "contentful-migration"
+
 def kebab_case(name: str) -> str:
     # Handle names that are already in kebab-case
     if '-' in name and name.islower():
@@ -30,16 +33,19 @@ def convert_field_type(contentful_type, validations=None):
     
     mapping = {
         "Symbol": "String",
-        "Text": "RichText",
+        # Long text is a plain (usually markdown) string, edited in a text area
+        "Text": "String",
         "Boolean": "Boolean",
         "Integer": "Number",
         "Number": "Number",
         "Date": "DateTime",
         "Object": "Json",
         "Location": "Geolocation",
-        "RichText": "RichText",
+        # Contentful rich text documents don't fit Squidex's RichText format, so they are kept as JSON
+        "RichText": "Json",
         "Link": "References",
-        "Array": "Array"
+        # Arrays of links become References/Assets fields; the only other item type is Symbol
+        "Array": "Tags"
     }
     return mapping.get(contentful_type, "String")
 
@@ -51,17 +57,40 @@ def is_dropdown_field(field):
             return True, validation["in"]
     return False, []
 
-def transform_content_type(contentful_model, schema_id_map, resolve_references=True):
-    original_name = contentful_model["name"]
+def get_link_type(field):
+    """linkType of a Link field, or of the items of an Array of Links; None for other fields"""
+    if field.get("type") == "Link":
+        return field.get("linkType")
+    if field.get("type") == "Array" and field.get("items", {}).get("type") == "Link":
+        return field["items"].get("linkType")
+    return None
+
+def get_schema_name(contentful_model):
+    """Squidex schema name for a Contentful content type"""
     # Use the actual Contentful content type ID for schema name (from sys.id)
     contentful_id = contentful_model.get("sys", {}).get("id", "")
     
     if contentful_id:
         # Convert Contentful ID to kebab-case for Squidx (which requires valid slugs)
-        schema_name = kebab_case(contentful_id)
-    else:
-        # Fallback to converting display name
-        schema_name = kebab_case(original_name)
+        return kebab_case(contentful_id)
+    # Fallback to converting display name
+    return kebab_case(contentful_model["name"])
+
+def get_referenced_schema_names(contentful_model):
+    """Schema names a content type's References fields reference via linkContentType"""
+    referenced = set()
+    for field in contentful_model.get("fields", []):
+        if field.get("omitted", False):
+            continue
+        if field["type"] == "Array" and field.get("items", {}).get("type") == "Link":
+            for validation in field.get("items", {}).get("validations", []):
+                for link_type in validation.get("linkContentType", []):
+                    referenced.add(kebab_case(link_type))
+    return referenced
+
+def transform_content_type(contentful_model, schema_id_map, resolve_references=True):
+    original_name = contentful_model["name"]
+    schema_name = get_schema_name(contentful_model)
 
     fields = []
     for field in contentful_model.get("fields", []):
@@ -92,8 +121,17 @@ def transform_content_type(contentful_model, schema_id_map, resolve_references=T
                 "fieldType": field_type,
                 "isRequired": field.get("required", False)
             }
+            if field["type"] == "Text":
+                properties["editor"] = "TextArea"
 
-        if field["type"] == "Array" and field.get("items", {}).get("type") == "Link":
+        target_type = get_link_type(field)
+        if target_type is not None and field["type"] == "Link":
+            # A single link holds at most one entry or asset
+            properties["maxItems"] = 1
+
+        if target_type == "Asset":
+            properties["fieldType"] = "Assets"
+        elif target_type is not None and field["type"] == "Array":
             schema_ids = []
             
             # Extract link types from validations
@@ -115,12 +153,11 @@ def transform_content_type(contentful_model, schema_id_map, resolve_references=T
                     print(f"📋 {schema_name} → Field: {field_name} → References: {link_types} → Schema IDs: {schema_ids}")
 
             properties.update({
-                "fieldType": "Component",
+                "fieldType": "References",
                 "schemaIds": schema_ids,
                 "isRequired": field.get("required", False),
                 "isRequiredOnPublish": False,
-                "isHalfWidth": False,
-                "cachedValues": {}
+                "isHalfWidth": False
             })
 
         field_obj = {
@@ -132,14 +169,6 @@ def transform_content_type(contentful_model, schema_id_map, resolve_references=T
             "properties": properties
         }
         
-        # Add cachedValues for Component fields
-        if properties.get("fieldType") == "Component":
-            field_obj["cachedValues"] = {
-                "canUpdate": True,
-                "isLocalizable": False,
-                "displayName": field.get("name", field_name)
-            }
-        
         fields.append(field_obj)
 
     # Define parent template schemas that should be in Templates category
@@ -173,16 +202,16 @@ def transform_content_type(contentful_model, schema_id_map, resolve_references=T
             "type": "Default"
         }
     else:
-        # Regular Component schema structure
+        # Content types hold entries, so they are Default schemas: Squidex can't create content in Components
         transformed_schema = {
             "name": schema_name,
             "fields": fields,
-            "type": "Component",
+            "type": "Default",
             "isPublished": True,
             "properties": {
                 "label": original_name,
                 "description": contentful_model.get("description", ""),
-                "tags": []
+                "tags": [MIGRATED_SCHEMA_TAG]
             }
         }
     
@@ -2,14 +2,18 @@
 # -*- coding: utf-8 -*-
 
 import os
+import threading
 import boto3
+import click
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class S3AssetDeleter:
-    def __init__(self):
+    def __init__(self, max_pool_connections=10):
         self.access_key_id = os.getenv("SQUIDEX_AWS_ACCESS_KEY_ID")
         self.secret_access_key = os.getenv("SQUIDEX_AWS_SECRET_ACCESS_KEY")
         self.bucket_name = os.getenv("SQUIDEX_S3_BUCKET_NAME")
@@ -20,7 +24,8 @@ class S3AssetDeleter:
             's3',
             aws_access_key_id=self.access_key_id,
             aws_secret_access_key=self.secret_access_key,
-            region_name=self.region
+            region_name=self.region,
+            config=Config(max_pool_connections=max_pool_connections)
         )
         
         print("Initialized S3 client for bucket: {} in region: {}".format(self.bucket_name, self.region))
@@ -63,6 +68,119 @@ class S3AssetDeleter:
             print("Error listing S3 objects: {}".format(str(e)))
             return []
     
+    def iter_key_batches(self, prefix):
+        """
+        Yield the keys of each listing page (up to 1000, one delete_objects batch) under prefix
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            keys = [obj['Key'] for obj in page.get('Contents', [])]
+            if keys:
+                yield keys
+    
+    def list_partitions(self, prefix):
+        """
+        Split a prefix into its immediate sub-prefixes using the "/" delimiter.
+        Returns (sub-prefixes, key batches of the objects directly under prefix).
+        """
+        sub_prefixes = []
+        direct_batches = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix, Delimiter='/'):
+            sub_prefixes.extend(common['Prefix'] for common in page.get('CommonPrefixes', []))
+            keys = [obj['Key'] for obj in page.get('Contents', [])]
+            if keys:
+                direct_batches.append(keys)
+        return sub_prefixes, direct_batches
+    
+    def delete_prefix_streaming(self, prefix="assets/", workers=8, partition=False):
+        """
+        Delete every object under prefix while it is being listed.
+        Each listing page goes straight to a delete_objects call, with up to
+        `workers` deletes in flight, so only those batches are held in memory.
+        With partition, each immediate sub-prefix is also listed in parallel.
+        Returns the deleted/failed counts.
+        """
+        totals = {'deleted': 0, 'failed': 0}
+        totals_lock = threading.Lock()
+        # Listing blocks once `workers` batches are waiting or being deleted
+        slots = threading.Semaphore(workers)
+        
+        print("Streaming deletion of objects with prefix '{}' ({} workers{})".format(
+            prefix, workers, ", partitioned listing" if partition else ""))
+        
+        with ThreadPoolExecutor(max_workers=workers) as delete_pool:
+            def record(future):
+                try:
+                    deleted, failed = future.result()
+                    with totals_lock:
+                        totals['deleted'] += len(deleted)
+                        totals['failed'] += len(failed)
+                finally:
+                    slots.release()
+            
+            def submit(keys):
+                slots.acquire()
+                delete_pool.submit(self._delete_batch, keys).add_done_callback(record)
+            
+            def delete_listing(list_prefix):
+                for keys in self.iter_key_batches(list_prefix):
+                    submit(keys)
+            
+            if partition:
+                sub_prefixes, direct_batches = self.list_partitions(prefix)
+                print("Listing {} sub-prefixes of '{}' in parallel".format(len(sub_prefixes), prefix))
+                for keys in direct_batches:
+                    submit(keys)
+                with ThreadPoolExecutor(max_workers=workers) as list_pool:
+                    list(list_pool.map(delete_listing, sub_prefixes))
+            else:
+                delete_listing(prefix)
+        
+        print("Deletion completed: {} objects deleted, {} failed".format(totals['deleted'], totals['failed']))
+        return totals
+    
+    def _delete_batch(self, batch):
+        """
+        Delete up to 1000 keys with a single delete_objects call.
+        Returns (deleted keys, failed {'key', 'error'} entries).
+        """
+        deleted_objects = []
+        failed_objects = []
+        
+        # Prepare delete request; Quiet mode only reports errors back
+        delete_request = {
+            'Objects': [{'Key': key} for key in batch],
+            'Quiet': True
+        }
+        
+        try:
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete=delete_request
+            )
+            
+            # Track failed deletions
+            failed_keys = set()
+            for error in response.get('Errors', []):
+                failed_keys.add(error['Key'])
+                failed_objects.append({
+                    'key': error['Key'],
+                    'error': error['Message']
+                })
+                print("Failed to delete {}: {}".format(error['Key'], error['Message']))
+            
+            # Everything that didn't report an error was deleted
+            deleted_objects = [key for key in batch if key not in failed_keys]
+            
+            print("Batch delete completed: {} deleted, {} failed".format(len(deleted_objects), len(failed_objects)))
+            
+        except Exception as e:
+            print("Batch delete failed: {}".format(str(e)))
+            failed_objects = [{'key': key, 'error': str(e)} for key in batch]
+        
+        return deleted_objects, failed_objects
+    
     def batch_delete_objects(self, s3_keys):
         """
         Delete multiple objects from S3 using batch delete
@@ -77,40 +195,9 @@ class S3AssetDeleter:
         failed_objects = []
         
         for i in range(0, len(s3_keys), batch_size):
-            batch = s3_keys[i:i + batch_size]
-            
-            # Prepare delete request
-            delete_request = {
-                'Objects': [{'Key': key} for key in batch]
-            }
-            
-            try:
-                response = self.s3_client.delete_objects(
-                    Bucket=self.bucket_name,
-                    Delete=delete_request
-                )
-                
-                # Track successful deletions
-                if 'Deleted' in response:
-                    deleted_objects.extend([obj['Key'] for obj in response['Deleted']])
-                
-                # Track failed deletions
-                if 'Errors' in response:
-                    for error in response['Errors']:
-                        failed_objects.append({
-                            'key': error['Key'],
-                            'error': error['Message']
-                        })
-                        print("Failed to delete {}: {}".format(error['Key'], error['Message']))
-                
-                print("Batch delete completed: {} deleted, {} failed".format(
-                    len(response.get('Deleted', [])), 
-                    len(response.get('Errors', []))
-                ))
-                
-            except Exception as e:
-                print("Batch delete failed: {}".format(str(e)))
-                failed_objects.extend([{'key': key, 'error': str(e)} for key in batch])
+            deleted, failed = self._delete_batch(s3_keys[i:i + batch_size])
+            deleted_objects.extend(deleted)
+            failed_objects.extend(failed)
         
         print("Total deletion results: {} deleted, {} failed".format(len(deleted_objects), len(failed_objects)))
         return {
@@ -149,14 +236,23 @@ class S3AssetDeleter:
         
         return failure_count == 0
 
-def main():
+@click.command()
+@click.option("--prefix", default="assets/", show_default=True,
+              help="Key prefix to delete")
+@click.option("--stream", is_flag=True,
+              help="Delete each listing page as it arrives, with several deletes in flight")
+@click.option("--workers", default=8, show_default=True,
+              help="Concurrent delete_objects calls (and sub-prefix listings) with --stream")
+@click.option("--partition", is_flag=True,
+              help="With --stream, list each sub-prefix of --prefix in parallel")
+def main(prefix, stream, workers, partition):
     """
     Delete migrated assets from S3 bucket
     """
     print("Starting S3 asset deletion")
     
-    # Initialize deleter
-    deleter = S3AssetDeleter()
+    # Initialize deleter; listings and deletes share the client's connection pool
+    deleter = S3AssetDeleter(max_pool_connections=max(10, workers * 2))
     
     try:
         # Check S3 bucket accessibility
@@ -165,8 +261,12 @@ def main():
             return
         
         # Delete all assets with prefix
-        print("Deleting ALL assets with prefix 'assets/'")
-        success = deleter.delete_all_assets_by_prefix("assets/")
+        print("Deleting ALL assets with prefix '{}'".format(prefix))
+        if stream:
+            result = deleter.delete_prefix_streaming(prefix, max(1, workers), partition)
+            success = result['failed'] == 0
+        else:
+            success = deleter.delete_all_assets_by_prefix(prefix)
         
         if success:
             print("Asset deletion completed successfully!")
@@ -1,51 +1,127 @@
 #!/usr/bin/env python3
 
 import os
+import click
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dotenv import load_dotenv
 from services.mongodb import MongoDBService
 
 load_dotenv()
 
-def main():
+def delete_run(mongodb_service, run_id, drop_collections=False, workers=8):
     """
-    Delete all migrated content from MongoDB
+    Roll back one migration run using its migration_summary document as the manifest.
+    Deletes the run's documents in parallel; with drop_collections, collections
+    holding only this run's documents are dropped instead.
+    """
+    manifest = mongodb_service.find_document("migration_summary", {"run_id": run_id})
+    if not manifest:
+        print("No migration summary found for run: {}".format(run_id))
+        return False
+
+    collections = manifest.get("collections", [])
+    print("Run {} ({} mode) wrote {} collections".format(run_id, manifest.get("mode", "full"), len(collections)))
+
+    def teardown(collection_name):
+        if drop_collections:
+            # Only a collection holding nothing but this run's documents may be dropped
+            others = mongodb_service.count_documents(collection_name, {"migration_metadata.run_id": {"$ne": run_id}})
+            if others == 0:
+                success = mongodb_service.drop_collection(collection_name)
+                print("{} collection: {}".format("Dropped" if success else "Failed to drop", collection_name))
+                return success
+            if others is None:
+                print("Could not check {} for other runs' documents; deleting instead of dropping".format(collection_name))
+            else:
+                print("{} also holds {} documents of other runs; deleting instead of dropping".format(collection_name, others))
+
+        # Uses the migration_metadata.run_id index, so only this run's documents are touched
+        deleted = mongodb_service.delete_documents(collection_name, {"migration_metadata.run_id": run_id})
+        if deleted is None:
+            print("Failed to delete documents of run {} from {}".format(run_id, collection_name))
+            return False
+        print("Deleted {} documents of run {} from {}".format(deleted, run_id, collection_name))
+        return True
+
+    # pymongo clients are thread-safe, so collections are torn down in parallel
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(teardown, collections))
+
+    if all(results):
+        mongodb_service.update_document("migration_summary", {"run_id": run_id}, {
+            "rolled_back_at": datetime.now().isoformat(),
+            "rolled_back_by_drop": drop_collections
+        })
+        return True
+
+    # The run stays unmarked so it can be rolled back again; record where this attempt failed
+    failed_collections = [name for name, success in zip(collections, results) if not success]
+    mongodb_service.update_document("migration_summary", {"run_id": run_id}, {
+        "rollback_failed_at": datetime.now().isoformat(),
+        "rollback_failed_collections": failed_collections
+    })
+    print("Rollback failed for {} collections: {}".format(len(failed_collections), ", ".join(failed_collections)))
+    return False
+
+def delete_all_collections(mongodb_service):
+    """
+    Drop every collection in the database
+    """
+    # List all collections
+    collections = mongodb_service.list_collections()
+
+    if not collections:
+        print("No collections found in database")
+        return
+
+    print("Found {} collections in database".format(len(collections)))
+
+    # Drop each collection completely
+    deleted_collections = 0
+    for collection_name in collections:
+
+        try:
+            success = mongodb_service.drop_collection(collection_name)
+            if success:
+                deleted_collections += 1
+                print("Successfully dropped collection: {}".format(collection_name))
+            else:
+                print("Failed to drop collection: {}".format(collection_name))
+        except Exception as e:
+            print("Error dropping collection {}: {}".format(collection_name, str(e)))
+
+@click.command()
+@click.option("--run-id", default=None,
+              help="Only remove documents written by this migration run (see the migration_summary collection)")
+@click.option("--drop-collections", is_flag=True,
+              help="With --run-id, drop the run's collections that hold no other run's documents instead of deleting its documents")
+@click.option("--workers", default=8, show_default=True,
+              help="Collections torn down in parallel with --run-id")
+def main(run_id, drop_collections, workers):
+    """
+    Delete migrated content from MongoDB
     """
     print("Starting MongoDB content deletion")
-    
+
     # Initialize MongoDB service
     mongodb_service = MongoDBService()
-    
+
     try:
         # Test MongoDB connection
         if not mongodb_service.test_connection():
             print("Cannot connect to MongoDB. Please check your connection string and credentials.")
             return
-        
-        # List all collections
-        collections = mongodb_service.list_collections()
-        
-        if not collections:
-            print("No collections found in database")
+
+        if run_id:
+            success = delete_run(mongodb_service, run_id, drop_collections, workers)
+            print("Run rollback completed!" if success else "Run rollback completed with errors.")
             return
-        
-        print("Found {} collections in database".format(len(collections)))
-        
-        # Drop each collection completely
-        deleted_collections = 0
-        for collection_name in collections:
-            
-            try:
-                success = mongodb_service.drop_collection(collection_name)
-                if success:
-                    deleted_collections += 1
-                    print("Successfully dropped collection: {}".format(collection_name))
-                else:
-                    print("Failed to drop collection: {}".format(collection_name))
-            except Exception as e:
-                print("Error dropping collection {}: {}".format(collection_name, str(e)))
-        
+
+        delete_all_collections(mongodb_service)
+
         print("Content deletion completed!")
-        
+
     except Exception as e:
         print("Deletion failed with error: {}".format(str(e)))
         raise
@@ -1,7 +1,10 @@
 import os
-import requests
+import click
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from config.settings import get_squidex_token, get_headers
+from config.settings import get_squidex_token, get_headers, get_squidex_session
+from core.schema_graph import topological_levels
+from core.transformer import MIGRATED_SCHEMA_TAG
 
 load_dotenv()
 
@@ -10,28 +13,106 @@ APP_NAME = os.getenv("SQUIDEX_APP_NAME")
 
 def get_schemas(headers):
     url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas"
-    response = requests.get(url, headers=headers)
+    response = get_squidex_session().get(url, headers=headers)
     response.raise_for_status()
     return response.json().get("items", [])
 
 def delete_schema(name, headers):
     url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas/{name}"
-    response = requests.delete(url, headers=headers)
+    response = get_squidex_session().delete(url, headers=headers)
     if response.status_code == 204:
         print(f"🗑️ Deleted schema: {name}")
+        return True
     else:
         print(f"⚠️ Failed to delete {name} - {response.status_code}: {response.text}")
+        return False
 
-def main():
+def is_migrated_schema(schema):
+    """Whether a schema was created from a Contentful content type (Component schemas come from older runs)"""
+    tags = (schema.get("properties") or {}).get("tags") or []
+    return MIGRATED_SCHEMA_TAG in tags or schema.get("type") == "Component" or schema.get("category") == "Templates"
+
+def get_referenced_schema_ids(schema):
+    """Schema IDs referenced by a live schema's fields, including nested array fields"""
+    referenced = set()
+
+    def collect(fields):
+        for field in fields or []:
+            referenced.update(field.get("properties", {}).get("schemaIds") or [])
+            collect(field.get("nested"))
+
+    collect(schema.get("fields"))
+    return referenced
+
+def get_referrers(schemas):
+    """Map each schema name to the names of the other schemas referencing it"""
+    names_by_id = {schema.get("id"): schema["name"] for schema in schemas}
+    referrers = {schema["name"]: set() for schema in schemas}
+
+    for schema in schemas:
+        for schema_id in get_referenced_schema_ids(schema):
+            referenced_name = names_by_id.get(schema_id)
+            # Self-references don't block deletion
+            if referenced_name and referenced_name != schema["name"]:
+                referrers[referenced_name].add(schema["name"])
+
+    return referrers
+
+@click.command()
+@click.option("--workers", default=8, show_default=True,
+              help="Independent schemas deleted in parallel")
+def main(workers):
     token = get_squidex_token()
     headers = get_headers(token)
     schemas = get_schemas(headers)
 
-    migrated_schemas = [s for s in schemas if s.get("type") == "Component" or s.get("category") == "Templates"]
-    print(f"Found {len(migrated_schemas)} schemas in 'Component' and 'Template' type.")
+    migrated_schemas = [s for s in schemas if is_migrated_schema(s)]
+    print(f"Found {len(migrated_schemas)} migrated content type and 'Template' schemas.")
+
+    # A schema is deleted only after every schema referencing it, so unreferenced schemas go first
+    referrers = get_referrers(migrated_schemas)
+    levels, cyclic = topological_levels(referrers)
+    print(f"Deleting in {len(levels)} reference levels" + (f", {len(cyclic)} schemas in reference cycles last" if cyclic else ""))
+
+    def delete(name):
+        # The token provider only refreshes when the cached token is about to expire
+        return delete_schema(name, get_headers(get_squidex_token()))
+
+    failed = []
+    skipped = []
+    # Schemas that are still there after their turn: anything they reference has to stay too
+    surviving = set()
+
+    def deletable(name):
+        blocking = referrers[name] & surviving
+        if blocking:
+            print(f"⏭️ Skipping {name}: still referenced by {', '.join(sorted(blocking))}")
+            skipped.append(name)
+            surviving.add(name)
+            return False
+        return True
+
+    def record(name, deleted):
+        if not deleted:
+            failed.append(name)
+            surviving.add(name)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for level in levels:
+            # Referrers are all in earlier levels, so the whole level can be checked up front
+            names = [name for name in level if deletable(name)]
+            for name, deleted in zip(names, executor.map(delete, names)):
+                record(name, deleted)
+
+    # Cycle members can't be ordered; delete them one by one
+    for name in cyclic:
+        if deletable(name):
+            record(name, delete(name))
 
-    for schema in migrated_schemas:
-        delete_schema(schema["name"], headers)
+    if failed:
+        print(f"⚠️ {len(failed)} schemas could not be deleted: {', '.join(failed)}")
+    if skipped:
+        print(f"⚠️ {len(skipped)} schemas skipped because schemas that could not be deleted still reference them: {', '.join(skipped)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from services.contentful_base import get_contentful_session
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output on a queue
+_DONE = object()
+
+class AssetMigrationPipeline:
+    """
+    asyncio pipeline for the asset migration: list -> download -> upload -> emit.
+    Stages are connected by bounded queues, so a slow stage applies backpressure
+    to the ones before it, and each stage has its own concurrency limit.
+    The blocking Contentful, HTTP and S3 calls run on a shared thread pool.
+    """
+    def __init__(self, contentful_service, s3_service, download_workers=4, upload_workers=4,
+                 queue_size=16, content_addressed=False, skip_existing=False):
+        self.contentful_service = contentful_service
+        self.s3_service = s3_service
+        self.download_workers = max(1, download_workers)
+        self.upload_workers = max(1, upload_workers)
+        self.queue_size = max(1, queue_size)
+        self.content_addressed = content_addressed
+        # Checked against the s3_service bucket index, which the caller builds first
+        self.skip_existing = skip_existing and not content_addressed
+        # Every download worker holds a Contentful connection
+        get_contentful_session(self.download_workers)
+    
+    def run(self, on_result=None):
+        """
+        Run the pipeline to completion.
+        on_result(asset_info, s3_result) is called as each asset finishes; s3_result is None on failure.
+        Returns the (asset_info, s3_result) pairs in completion order.
+        """
+        return asyncio.run(self._run(on_result))
+    
+    async def _run(self, on_result):
+        loop = asyncio.get_running_loop()
+        # One thread each for listing and emitting results, plus the transfer workers
+        executor = ThreadPoolExecutor(max_workers=2 + self.download_workers + self.upload_workers)
+        
+        download_queue = asyncio.Queue(maxsize=self.queue_size)
+        upload_queue = asyncio.Queue(maxsize=self.queue_size)
+        result_queue = asyncio.Queue(maxsize=self.queue_size)
+        results = []
+        
+        def blocking(func, *args):
+            return loop.run_in_executor(executor, func, *args)
+        
+        async def list_assets():
+            assets = self.contentful_service.iter_processed_assets()
+            while True:
+                asset_info = await blocking(next, assets, _DONE)
+                if asset_info is _DONE:
+                    break
+                if self.skip_existing and await blocking(self.s3_service.is_asset_unchanged, asset_info):
+                    # Unchanged assets bypass the transfer stages
+                    await result_queue.put((asset_info, self.s3_service.build_skipped_result(asset_info)))
+                    continue
+                await download_queue.put(asset_info)
+            for _ in range(self.download_workers):
+                await download_queue.put(_DONE)
+        
+        async def download():
+            while True:
+                asset_info = await download_queue.get()
+                if asset_info is _DONE:
+                    return
+                downloaded = None
+                if asset_info.get("url"):
+                    downloaded = await blocking(self.s3_service.download_asset_to_spool, asset_info["url"])
+                if downloaded:
+                    await upload_queue.put((asset_info, downloaded))
+                else:
+                    await result_queue.put((asset_info, None))
+        
+        async def upload():
+            while True:
+                item = await upload_queue.get()
+                if item is _DONE:
+                    return
+                asset_info, (spool, digest) = item
+                s3_result = await blocking(
+                    self.s3_service.upload_spooled_asset, asset_info, spool, digest, self.content_addressed
+                )
+                await result_queue.put((asset_info, s3_result))
+        
+        async def emit():
+            while True:
+                item = await result_queue.get()
+                if item is _DONE:
+                    return
+                results.append(item)
+                if on_result:
+                    # on_result may write to the SQLite mapping store, which must not block the loop
+                    await blocking(on_result, *item)
+        
+        async def close_after(workers, queue, count):
+            await asyncio.gather(*workers)
+            for _ in range(count):
+                await queue.put(_DONE)
+        
+        try:
+            downloaders = [asyncio.ensure_future(download()) for _ in range(self.download_workers)]
+            uploaders = [asyncio.ensure_future(upload()) for _ in range(self.upload_workers)]
+            await asyncio.gather(
+                list_assets(),
+                close_after(downloaders, upload_queue, self.upload_workers),
+                close_after(uploaders, result_queue, 1),
+                emit()
+            )
+        finally:
+            executor.shutdown(wait=True)
+        
+        logger.info(f"Asset pipeline finished: {len(results)} assets processed")
+        return results
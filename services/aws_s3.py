@@ -1,12 +1,23 @@
 import boto3
+import hashlib
 import os
 import requests
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from urllib.parse import urlparse
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
+from services.contentful_base import get_contentful_session, CONNECT_TIMEOUT, READ_TIMEOUT
 
 load_dotenv()
 
+# Streaming uploads buffer at most chunk size x concurrency bytes per transfer
+STREAM_CHUNK_SIZE = int(os.getenv("S3_STREAM_CHUNK_MB", "8")) * 1024 * 1024
+STREAM_CONCURRENCY = int(os.getenv("S3_STREAM_CONCURRENCY", "4"))
+
 class S3AssetService:
     def __init__(self):
         self.access_key_id = os.getenv("SQUIDEX_AWS_ACCESS_KEY_ID")
@@ -22,6 +33,18 @@ class S3AssetService:
             region_name=self.region
         )
         
+        self.transfer_config = TransferConfig(
+            multipart_threshold=STREAM_CHUNK_SIZE,
+            multipart_chunksize=STREAM_CHUNK_SIZE,
+            max_concurrency=STREAM_CONCURRENCY
+        )
+        
+        # key -> {size, etag, last_modified}, filled by build_bucket_index()
+        self.bucket_index = {}
+        # Digest keys known to exist, shared by content-addressed upload workers
+        self.stored_digest_keys = set()
+        self.digest_lock = threading.Lock()
+        
         print("Initialized S3 client for bucket: {} in region: {}".format(self.bucket_name, self.region))
     
     def check_bucket_exists(self):
@@ -42,6 +65,66 @@ class S3AssetService:
                 print("Error accessing S3 bucket '{}': {}".format(self.bucket_name, e))
             return False
     
+    def build_bucket_index(self, prefix="assets/"):
+        """
+        List the target prefix once and index existing objects by key
+        """
+        try:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            index = {}
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    index[obj['Key']] = {
+                        "size": obj['Size'],
+                        "etag": obj['ETag'].strip('"'),
+                        "last_modified": obj['LastModified']
+                    }
+            
+            self.bucket_index = index
+            print("Indexed {} existing objects in S3 with prefix '{}'".format(len(index), prefix))
+            return index
+        
+        except Exception as e:
+            print("Error indexing S3 objects: {}".format(str(e)))
+            self.bucket_index = {}
+            return self.bucket_index
+    
+    def is_asset_unchanged(self, asset_info):
+        """
+        Check whether this version of the asset is already in S3.
+        The bucket index rules out most assets without a request; on a key and
+        size match the object's metadata must name this asset and its updated-at.
+        """
+        s3_key = self.generate_s3_key(asset_info)
+        existing = self.bucket_index.get(s3_key)
+        if not existing or existing["size"] != asset_info.get("size"):
+            return False
+        
+        updated_at = asset_info.get("updated_at")
+        if not updated_at:
+            return False
+        
+        try:
+            metadata = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key).get("Metadata", {})
+        except Exception as e:
+            print("Error reading metadata of {}: {}".format(s3_key, str(e)))
+            return False
+        
+        # Keys are title-based and can collide, so the object must belong to this asset
+        if metadata.get("asset-id") != asset_info.get("asset_id"):
+            return False
+        
+        stored_updated_at = metadata.get("updated-at")
+        if stored_updated_at:
+            return stored_updated_at == updated_at
+        
+        try:
+            # Objects uploaded before updated-at was stored: one written after the update is current
+            updated_at = datetime.fromisoformat(updated_at.replace("Z", "+00:00"))
+            return existing["last_modified"] >= updated_at
+        except (TypeError, ValueError):
+            return False
+    
     def generate_s3_key(self, asset_info):
         """
         Generate S3 key for the asset using title
@@ -109,14 +192,6 @@ class S3AssetService:
             # Generate S3 key
             s3_key = self.generate_s3_key(asset_info)
             
-            # Prepare metadata
-            metadata = {
-                'original-url': url,
-                'asset-id': asset_info.get('asset_id', ''),
-                'title': asset_info.get('title', '')[:1000],  # S3 metadata has size limits
-                'original-filename': asset_info.get('filename', '')
-            }
-            
             # Upload to S3
             print("Uploading to S3: {}".format(s3_key))
             self.s3_client.put_object(
@@ -124,42 +199,285 @@ class S3AssetService:
                 Key=s3_key,
                 Body=asset_data,
                 ContentType=asset_info.get('content_type', 'application/octet-stream'),
-                Metadata=metadata
+                Metadata=self._build_metadata(asset_info)
             )
             
-            # Generate S3 URL
-            s3_url = "https://{}.s3.{}.amazonaws.com/{}".format(self.bucket_name, self.region, s3_key)
-            
             print("Successfully uploaded {} to S3".format(asset_info.get('filename')))
             
-            return {
-                "asset_id": asset_info.get("asset_id"),
-                "original_url": url,
-                "s3_key": s3_key,
-                "s3_url": s3_url,
-                "size": asset_info.get("size"),
-                "content_type": asset_info.get("content_type"),
-                "filename": asset_info.get("filename"),
-                "title": asset_info.get("title")
-            }
+            return self._build_upload_result(asset_info, s3_key)
             
         except Exception as e:
             print("Error uploading asset {} to S3: {}".format(asset_info.get('asset_id'), str(e)))
             return None
     
-    def batch_upload_assets(self, assets_list):
+    def stream_asset_to_s3(self, asset_info):
         """
-        Upload multiple assets to S3
+        Stream a single asset from Contentful into S3 as a managed multipart
+        upload, without holding the whole file in memory
         """
-        results = []
+        import time
+        max_retries = 3
+        retry_delay = 2
+        
+        url = asset_info.get("url")
+        if not url:
+            print("No URL found for asset {}".format(asset_info.get('asset_id')))
+            return None
+        
+        s3_key = self.generate_s3_key(asset_info)
+        session = get_contentful_session()
+        
+        for attempt in range(max_retries):
+            try:
+                print("Streaming asset (attempt {}/{}): {} -> {}".format(attempt + 1, max_retries, url, s3_key))
+                with session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+                    response.raise_for_status()
+                    # Let urllib3 undo any Content-Encoding while S3 reads the body
+                    response.raw.decode_content = True
+                    self.s3_client.upload_fileobj(
+                        response.raw,
+                        self.bucket_name,
+                        s3_key,
+                        ExtraArgs={
+                            'ContentType': asset_info.get('content_type', 'application/octet-stream'),
+                            'Metadata': self._build_metadata(asset_info)
+                        },
+                        Config=self.transfer_config
+                    )
+                
+                print("Successfully streamed {} to S3".format(asset_info.get('filename')))
+                return self._build_upload_result(asset_info, s3_key)
+            
+            except Exception as e:
+                print("Streaming attempt {} failed: {}".format(attempt + 1, str(e)))
+                if attempt < max_retries - 1:
+                    print("Retrying in {} seconds...".format(retry_delay))
+                    time.sleep(retry_delay)
+                    retry_delay *= 2  # Exponential backoff
+                else:
+                    print("All streaming attempts failed for: {}".format(url))
+                    return None
+    
+    def generate_digest_key(self, digest):
+        """
+        Generate the content-addressed S3 key for a SHA-256 digest
+        """
+        return "assets/sha256/{}".format(digest)
+    
+    def _digest_key_exists(self, s3_key):
+        """
+        Check whether a content-addressed object is already stored
+        """
+        with self.digest_lock:
+            if s3_key in self.stored_digest_keys or s3_key in self.bucket_index:
+                return True
+        
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        
+        with self.digest_lock:
+            self.stored_digest_keys.add(s3_key)
+        return True
+    
+    def download_asset_to_spool(self, url):
+        """
+        Download an asset into a spooled temporary file while hashing it.
+        Only STREAM_CHUNK_SIZE bytes stay in memory; larger files spill to disk.
+        Returns (spool, sha256 hexdigest) or None if every attempt failed.
+        """
+        import time
+        max_retries = 3
+        retry_delay = 2
+        session = get_contentful_session()
+        
+        for attempt in range(max_retries):
+            spool = tempfile.SpooledTemporaryFile(max_size=STREAM_CHUNK_SIZE)
+            try:
+                print("Attempting download (attempt {}/{}): {}".format(attempt + 1, max_retries, url))
+                digest = hashlib.sha256()
+                with session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        digest.update(chunk)
+                        spool.write(chunk)
+                
+                spool.seek(0)
+                return spool, digest.hexdigest()
+            
+            except Exception as e:
+                spool.close()
+                print("Download attempt {} failed: {}".format(attempt + 1, str(e)))
+                if attempt < max_retries - 1:
+                    print("Retrying in {} seconds...".format(retry_delay))
+                    time.sleep(retry_delay)
+                    retry_delay *= 2  # Exponential backoff
+                else:
+                    print("All download attempts failed for: {}".format(url))
+                    return None
+    
+    def upload_spooled_asset(self, asset_info, spool, digest, content_addressed=False):
+        """
+        Upload a downloaded asset from its spool file and close the spool.
+        In content-addressed mode the digest key is used and existing content is not re-uploaded.
+        """
+        try:
+            if content_addressed:
+                s3_key = self.generate_digest_key(digest)
+                if self._digest_key_exists(s3_key):
+                    print("Content already stored as {}, skipping upload".format(s3_key))
+                    return {**self._build_upload_result(asset_info, s3_key), "sha256": digest}
+            else:
+                s3_key = self.generate_s3_key(asset_info)
+            
+            print("Uploading to S3: {}".format(s3_key))
+            self.s3_client.upload_fileobj(
+                spool,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={
+                    'ContentType': asset_info.get('content_type', 'application/octet-stream'),
+                    'Metadata': {**self._build_metadata(asset_info), 'sha256': digest}
+                },
+                Config=self.transfer_config
+            )
+            
+            if content_addressed:
+                with self.digest_lock:
+                    self.stored_digest_keys.add(s3_key)
+            
+            print("Successfully uploaded {} to S3".format(asset_info.get('filename')))
+            return {**self._build_upload_result(asset_info, s3_key), "sha256": digest}
+        
+        except Exception as e:
+            print("Error uploading asset {} to S3: {}".format(asset_info.get('asset_id'), str(e)))
+            return None
+        finally:
+            spool.close()
+    
+    def store_asset_by_digest(self, asset_info):
+        """
+        Store an asset once under the SHA-256 of its bytes.
+        The body is hashed while streaming into a spooled temporary file, so
+        identical files under different titles are only uploaded once.
+        """
+        url = asset_info.get("url")
+        if not url:
+            print("No URL found for asset {}".format(asset_info.get('asset_id')))
+            return None
+        
+        downloaded = self.download_asset_to_spool(url)
+        if not downloaded:
+            return None
+        
+        spool, digest = downloaded
+        return self.upload_spooled_asset(asset_info, spool, digest, content_addressed=True)
+    
+    def _build_metadata(self, asset_info):
+        """
+        Build the S3 object metadata for an asset
+        """
+        return {
+            'original-url': asset_info.get('url', ''),
+            'asset-id': asset_info.get('asset_id', ''),
+            'title': asset_info.get('title', '')[:1000],  # S3 metadata has size limits
+            'original-filename': asset_info.get('filename', ''),
+            'updated-at': asset_info.get('updated_at') or ''
+        }
+    
+    def _build_upload_result(self, asset_info, s3_key):
+        """
+        Build the mapping record returned for a successfully uploaded asset
+        """
+        # Generate S3 URL
+        s3_url = "https://{}.s3.{}.amazonaws.com/{}".format(self.bucket_name, self.region, s3_key)
+        
+        return {
+            "asset_id": asset_info.get("asset_id"),
+            "original_url": asset_info.get("url"),
+            "s3_key": s3_key,
+            "s3_url": s3_url,
+            "size": asset_info.get("size"),
+            "content_type": asset_info.get("content_type"),
+            "filename": asset_info.get("filename"),
+            "title": asset_info.get("title")
+        }
+    
+    def build_skipped_result(self, asset_info):
+        """
+        Mapping record for an asset left in place because it is unchanged in S3
+        """
+        print("Skipping unchanged asset: {}".format(asset_info.get('filename')))
+        return {**self._build_upload_result(asset_info, self.generate_s3_key(asset_info)), "skipped": True}
+    
+    def delete_asset_from_s3(self, s3_key):
+        """
+        Delete a single migrated asset from S3
+        """
+        try:
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            print("Deleted {} from S3".format(s3_key))
+            return True
+        except Exception as e:
+            print("Error deleting {} from S3: {}".format(s3_key, str(e)))
+            return False
+    
+    def get_upload_method(self, stream=False, content_addressed=False):
+        """
+        Pick the transfer implementation for a migration run
+        """
+        if content_addressed:
+            return self.store_asset_by_digest
+        return self.stream_asset_to_s3 if stream else self.upload_asset_to_s3
+    
+    def upload_assets_concurrently(self, assets_list, max_workers=4, stream=False, skip_existing=False,
+                                   content_addressed=False, on_result=None):
+        """
+        Upload assets through a bounded worker pool.
+        Returns (asset_info, s3_result) pairs in input order; s3_result is None on failure.
+        With skip_existing, assets already in the bucket index are not transferred.
+        on_result(asset_info, s3_result) is called from the worker as soon as each asset finishes.
+        """
+        upload_asset = self.get_upload_method(stream, content_addressed)
         total_assets = len(assets_list)
+        # Every worker holds a Contentful download connection
+        get_contentful_session(max_workers)
         
-        print("Starting batch upload of {} assets to S3".format(total_assets))
+        print("Uploading {} assets to S3 with {} workers".format(total_assets, max_workers))
         
-        for i, asset_info in enumerate(assets_list, 1):
+        def process(indexed_asset):
+            i, asset_info = indexed_asset
             print("Processing asset {}/{}: {}".format(i, total_assets, asset_info.get('filename')))
+            if skip_existing and not content_addressed and self.is_asset_unchanged(asset_info):
+                s3_result = self.build_skipped_result(asset_info)
+            else:
+                try:
+                    s3_result = upload_asset(asset_info)
+                except Exception as e:
+                    print("Error processing asset {}: {}".format(asset_info.get('asset_id'), str(e)))
+                    s3_result = None
             
-            result = self.upload_asset_to_s3(asset_info)
+            if on_result:
+                on_result(asset_info, s3_result)
+            return asset_info, s3_result
+        
+        # boto3 clients and the pooled requests session are safe to share across threads
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            return list(executor.map(process, enumerate(assets_list, 1)))
+    
+    def batch_upload_assets(self, assets_list, max_workers=1, stream=False):
+        """
+        Upload multiple assets to S3
+        """
+        total_assets = len(assets_list)
+        
+        print("Starting batch upload of {} assets to S3".format(total_assets))
+        
+        results = []
+        for asset_info, result in self.upload_assets_concurrently(assets_list, max_workers, stream):
             if result:
                 results.append(result)
             else:
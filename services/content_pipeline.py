@@ -0,0 +1,204 @@
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from core.asset_mapping_store import AssetMappingStore
+from core.content_plan import compile_transform_plan
+from services.contentful_base import PAGE_CONCURRENCY
+from services.contentful_content import ContentfulContentService
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the page stream on the write queue
+_DONE = object()
+
+# Per-process state of the transform pool, set up once by _init_transform_worker
+_worker_state = {}
+
+def _init_transform_worker(asset_mapping, run_id):
+    """
+    Build the state each transform process reuses for every page.
+    asset_mapping is a mapping dict or the path of an AssetMappingStore,
+    which is reopened here because SQLite connections can't cross processes.
+    """
+    from core.content_transformer import ContentTransformer
+    
+    if isinstance(asset_mapping, str):
+        asset_mapping = AssetMappingStore(asset_mapping)
+    
+    _worker_state["transformer"] = ContentTransformer(run_id)
+    _worker_state["asset_mapping"] = asset_mapping
+    _worker_state["plans"] = {}
+
+def _transform_raw_page(raw_page, content_type_info):
+    """
+    Decode one raw CMA page and transform its entries into MongoDB documents.
+    Runs in a transform process; returns (documents, fetched, total).
+    """
+    data = json.loads(raw_page)
+    items = data.get("items", [])
+    
+    plans = _worker_state["plans"]
+    content_type_id = (content_type_info or {}).get("sys", {}).get("id")
+    if content_type_id not in plans:
+        plans[content_type_id] = compile_transform_plan(content_type_info)
+    plan = plans[content_type_id]
+    
+    transformer = _worker_state["transformer"]
+    documents = []
+    for entry in items:
+        # Extraction is pure, so workers don't need a Contentful client
+        entry_info = ContentfulContentService.extract_entry_info(entry, plan)
+        if not entry_info:
+            continue
+        document = transformer.transform_content_for_mongodb(entry_info, _worker_state["asset_mapping"], plan)
+        if document:
+            documents.append(document)
+    
+    return documents, len(items), data.get("total", 0)
+
+class ContentMigrationPipeline:
+    """
+    Page-at-a-time content migration: extract -> transform -> bulk write.
+    A writer thread loads each transformed page into MongoDB while the next
+    page is fetched, and the bounded queue between them keeps memory to a
+    few pages regardless of content type size.
+    With transform_processes > 0, JSON decoding and transformation of each raw
+    page run on a process pool so they are not limited to one core, while up
+    to `concurrency` raw pages are fetched in parallel.
+    """
+    def __init__(self, contentful_service, mongodb_service, transformer, asset_mapping=None,
+                 batch_size=1000, page_limit=1000, max_pending_pages=2, concurrency=None,
+                 transform_processes=0):
+        self.contentful_service = contentful_service
+        self.mongodb_service = mongodb_service
+        self.transformer = transformer
+        self.asset_mapping = asset_mapping
+        self.batch_size = batch_size
+        self.page_limit = page_limit
+        self.max_pending_pages = max(1, max_pending_pages)
+        self.concurrency = concurrency
+        self.transform_processes = transform_processes
+        self.process_pool = None
+        
+        if transform_processes > 0:
+            # Each worker gets the store path rather than the open store
+            mapping_source = asset_mapping.path if isinstance(asset_mapping, AssetMappingStore) else asset_mapping
+            # The parent already runs HTTP and writer threads, which are unsafe to fork
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=transform_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_transform_worker,
+                initargs=(mapping_source, transformer.run_id)
+            )
+            logger.info(f"Started {transform_processes} transform processes")
+    
+    def close(self):
+        """
+        Shut down the transform process pool, if any
+        """
+        if self.process_pool:
+            self.process_pool.shutdown(wait=True)
+            self.process_pool = None
+    
+    def transform_page(self, page, plan=None):
+        """
+        Turn one page of raw Contentful entries into MongoDB documents
+        """
+        documents = []
+        for entry in page:
+            entry_info = self.contentful_service.extract_entry_info(entry, plan)
+            if not entry_info:
+                continue
+            document = self.transformer.transform_content_for_mongodb(entry_info, self.asset_mapping, plan)
+            if document:
+                documents.append(document)
+        return documents
+    
+    def iter_transformed_pages(self, content_type_id, content_type_info=None):
+        """
+        Yield (fetched, documents) for each page of a content type, transformed in this process
+        """
+        plan = compile_transform_plan(content_type_info)
+        for page in self.contentful_service.iter_entry_pages(content_type_id, self.page_limit, self.concurrency):
+            yield len(page), self.transform_page(page, plan)
+    
+    def iter_pool_transformed_pages(self, content_type_id, content_type_info=None):
+        """
+        Yield (fetched, documents) for each page of a content type, in skip order.
+        Raw page bytes are sent to the process pool, one page per task: a
+        full page amortizes the IPC cost over up to 1000 entries. Pages go
+        through the client's page window, widened so that `concurrency` fetches
+        and transform_processes transforms can be in flight at once.
+        """
+        def load_page(raw_page):
+            documents, fetched, total = self.process_pool.submit(_transform_raw_page, raw_page, content_type_info).result()
+            return (fetched, documents), fetched, total
+        
+        return self.contentful_service.iter_entry_pages(
+            content_type_id,
+            self.page_limit,
+            max(1, self.concurrency or PAGE_CONCURRENCY) + self.transform_processes,
+            load_page=load_page
+        )
+    
+    def migrate_content_type(self, content_type_id, collection_name, content_type_info=None):
+        """
+        Stream one content type into its collection.
+        With the content type definition, entries are transformed through its compiled plan.
+        Returns fetched/transformed counts and the bulk write totals.
+        """
+        stats = {
+            "content_type": content_type_id,
+            "collection": collection_name,
+            "fetched": 0,
+            "transformed": 0,
+            "inserted": 0,
+            "modified": 0,
+            "matched": 0,
+            "failed": 0
+        }
+        write_queue = queue.Queue(maxsize=self.max_pending_pages)
+        writer_errors = []
+        
+        def write_pages():
+            while True:
+                documents = write_queue.get()
+                if documents is _DONE:
+                    return
+                if writer_errors:
+                    continue  # Keep draining so the fetcher never blocks on a dead writer
+                try:
+                    result = self.mongodb_service.bulk_upsert_documents(collection_name, documents, self.batch_size)
+                    for key in ("inserted", "modified", "matched", "failed"):
+                        stats[key] += result[key]
+                except Exception as e:
+                    writer_errors.append(e)
+        
+        writer = threading.Thread(target=write_pages, name="mongodb-writer-{}".format(content_type_id), daemon=True)
+        writer.start()
+        
+        if self.process_pool:
+            pages = self.iter_pool_transformed_pages(content_type_id, content_type_info)
+        else:
+            pages = self.iter_transformed_pages(content_type_id, content_type_info)
+        
+        try:
+            for fetched, documents in pages:
+                stats["fetched"] += fetched
+                stats["transformed"] += len(documents)
+                if documents:
+                    write_queue.put(documents)
+                if writer_errors:
+                    break
+        finally:
+            write_queue.put(_DONE)
+            writer.join()
+        
+        if writer_errors:
+            raise writer_errors[0]
+        
+        logger.info(f"Pipelined {stats['transformed']}/{stats['fetched']} entries of {content_type_id} into '{collection_name}'")
+        return stats
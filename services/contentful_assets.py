@@ -7,11 +7,17 @@ class ContentfulAssetsService:
     def __init__(self):
         self.client = ContentfulClient()
     
-    def get_all_assets(self, limit=1000):
+    def get_all_assets(self, limit=1000, concurrency=None):
         """
         Get all assets from Contentful
         """
-        return self.client.get_all_paginated_data("assets", limit=limit)
+        return self.client.get_all_paginated_data("assets", limit=limit, concurrency=concurrency)
+    
+    def iter_assets(self, limit=1000, concurrency=None):
+        """
+        Yield all assets from Contentful page by page
+        """
+        return self.client.iter_paginated_data("assets", limit=limit, concurrency=concurrency)
     
     def get_assets_batch(self, limit=1000, skip=0):
         """
@@ -81,3 +87,12 @@ class ContentfulAssetsService:
         
         logger.info(f"Processed {len(processed_assets)} valid assets out of {len(assets)} total assets")
         return processed_assets
+    
+    def iter_processed_assets(self, limit=1000, concurrency=None):
+        """
+        Yield processed file information for each valid asset as pages arrive
+        """
+        for asset in self.iter_assets(limit=limit, concurrency=concurrency):
+            file_info = self.extract_file_info(asset)
+            if file_info:
+                yield file_info
@@ -1,7 +1,14 @@
 import requests
 import os
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from services.contentful_cache import get_response_cache
+from core.concurrency import iter_window
 
 load_dotenv()
 
@@ -9,6 +16,60 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared HTTP transport settings for every Contentful service
+POOL_SIZE = int(os.getenv("CONTENTFUL_HTTP_POOL_SIZE", "10"))
+CONNECT_TIMEOUT = float(os.getenv("CONTENTFUL_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("CONTENTFUL_READ_TIMEOUT", "60"))
+PAGE_CONCURRENCY = int(os.getenv("CONTENTFUL_PAGE_CONCURRENCY", "1"))
+# Rate-limited (429) requests are retried this many times, waiting as the response asks
+MAX_RETRIES = int(os.getenv("CONTENTFUL_MAX_RETRIES", "5"))
+RETRY_BACKOFF = float(os.getenv("CONTENTFUL_RETRY_BACKOFF", "1"))
+
+_session = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+def _mount_pool(session, size):
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+def get_contentful_session(pool_size=None):
+    """
+    Get the shared, pooled HTTP session used for all Contentful requests.
+    The session is created once and reused across services and threads.
+    Asking for a larger pool_size than the current pool grows it, so callers
+    running more concurrent requests than CONTENTFUL_HTTP_POOL_SIZE keep
+    every connection alive instead of overflowing the pool.
+    """
+    global _session, _session_pool_size
+    with _session_lock:
+        size = max(pool_size or 0, POOL_SIZE)
+        if _session is None:
+            session = requests.Session()
+            _mount_pool(session, size)
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            _session = session
+            _session_pool_size = size
+            logger.info(f"Initialized pooled Contentful HTTP session (pool size: {size})")
+        elif size > _session_pool_size:
+            _mount_pool(_session, size)
+            _session_pool_size = size
+            logger.info(f"Grew pooled Contentful HTTP session (pool size: {size})")
+    return _session
+
+def get_retry_delay(response, attempt):
+    """
+    Seconds to wait before retrying a rate-limited response: Retry-After or
+    Contentful's rate limit reset header, else exponential backoff
+    """
+    for header in ("Retry-After", "X-Contentful-RateLimit-Reset"):
+        try:
+            return max(0.0, float(response.headers.get(header)))
+        except (TypeError, ValueError):
+            continue
+    return RETRY_BACKOFF * (2 ** attempt)
+
 class ContentfulClient:
     def __init__(self):
         self.space_id = os.getenv("CONTENTFUL_SPACE_ID")
@@ -19,21 +80,87 @@ class ContentfulClient:
             "Authorization": f"Bearer {self.cma_token}",
             "Content-Type": "application/vnd.contentful.management.v1+json"
         }
+        # The Sync API is served by the Content Delivery API, not the CMA
+        self.delivery_token = os.getenv("CONTENTFUL_DELIVERY_TOKEN")
+        self.sync_base_url = "{}/spaces/{}/environments/{}".format(
+            os.getenv("CONTENTFUL_SYNC_URL", "https://cdn.contentful.com").rstrip("/"),
+            self.space_id,
+            self.environment_id
+        )
+        self.session = get_contentful_session()
+        self.timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.cache = get_response_cache()
+    
+    def _get(self, url, headers, params=None):
+        """
+        GET through the shared session, retrying rate-limited (429) responses.
+        Concurrent page fetches can exceed the CMA rate limit, so they wait and retry instead of failing.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            if response.status_code != 429 or attempt == MAX_RETRIES:
+                return response
+            delay = get_retry_delay(response, attempt)
+            logger.warning(f"Rate limited on {url}, retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})")
+            time.sleep(delay)
     
     def make_request(self, endpoint, params=None):
         """
         Make a GET request to Contentful API
         """
+        return json.loads(self.make_raw_request(endpoint, params))
+    
+    def make_raw_request(self, endpoint, params=None):
+        """
+        Make a GET request to Contentful API and return the raw response body.
+        Goes through the on-disk response cache when one is configured.
+        """
         url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params)
+        
+        if self.cache is None:
+            response = self._get(url, self.headers, params)
+            response.raise_for_status()
+            return response.content
+        
+        key = self.cache.make_key(url, params)
+        cached = self.cache.get(key)
+        headers = self.headers
+        
+        if cached:
+            body, etag, is_fresh = cached
+            if is_fresh:
+                return body
+            if etag:
+                headers = {**self.headers, "If-None-Match": etag}
+        
+        response = self._get(url, headers, params)
+        
+        if response.status_code == 304 and cached:
+            self.cache.refresh(key)
+            return cached[0]
+        
+        response.raise_for_status()
+        self.cache.set(key, response.content, response.headers.get("ETag"))
+        return response.content
+    
+    def make_sync_request(self, params=None):
+        """
+        Make a GET request to the Contentful Sync endpoint
+        """
+        if not self.delivery_token:
+            raise ValueError("CONTENTFUL_DELIVERY_TOKEN is required for the Sync API")
+        
+        headers = {"Authorization": f"Bearer {self.delivery_token}"}
+        response = self._get(f"{self.sync_base_url}/sync", headers, params)
         response.raise_for_status()
         return response.json()
     
-    def get_paginated_data(self, endpoint, limit=1000, skip=0):
+    def get_paginated_data(self, endpoint, limit=1000, skip=0, params=None):
         """
         Get paginated data from Contentful API
         """
         params = {
+            **(params or {}),
             "limit": limit,
             "skip": skip
         }
@@ -46,21 +173,62 @@ class ContentfulClient:
         
         return items, total
     
-    def get_all_paginated_data(self, endpoint, limit=1000):
+    def get_all_paginated_data(self, endpoint, limit=1000, params=None, concurrency=None):
         """
-        Get all data from a paginated endpoint
+        Get all data from a paginated endpoint.
+        With concurrency > 1 the remaining pages are fetched in parallel once
+        the first page reports the total, and returned in skip order.
         """
-        all_items = []
-        skip = 0
-        
-        while True:
-            items, total = self.get_paginated_data(endpoint, limit=limit, skip=skip)
-            all_items.extend(items)
-            
-            if skip + len(items) >= total:
-                break
-                
-            skip += limit
+        all_items = list(self.iter_paginated_data(endpoint, limit=limit, params=params, concurrency=concurrency))
         
         logger.info(f"Fetched total {len(all_items)} items from {endpoint}")
         return all_items
+    
+    def iter_paginated_data(self, endpoint, limit=1000, params=None, concurrency=None):
+        """
+        Yield items from a paginated endpoint one page at a time
+        """
+        for items in self.iter_pages(endpoint, limit=limit, params=params, concurrency=concurrency):
+            yield from items
+    
+    def iter_pages(self, endpoint, limit=1000, params=None, concurrency=None, load_page=None):
+        """
+        Yield each page of items from a paginated endpoint in skip order.
+        At most `concurrency` pages are held in memory at any time.
+        load_page(raw_body) -> (page, item_count, total) replaces the default JSON
+        decoding, e.g. to hand raw pages to a process pool; its page is yielded.
+        """
+        concurrency = concurrency or PAGE_CONCURRENCY
+        
+        def fetch_page(skip):
+            if load_page is None:
+                items, total = self.get_paginated_data(endpoint, limit=limit, skip=skip, params=params)
+                return items, len(items), total
+            return load_page(self.make_raw_request(endpoint, {**(params or {}), "limit": limit, "skip": skip}))
+        
+        page, count, total = fetch_page(0)
+        if not count:
+            return
+        yield page
+        
+        if concurrency <= 1:
+            skip = limit
+            while skip < total:
+                page, count, total = fetch_page(skip)
+                if not count:
+                    break
+                yield page
+                skip += limit
+            return
+        
+        skips = range(limit, total, limit)
+        if not skips:
+            return
+        
+        logger.info(f"Fetching {len(skips)} remaining pages from {endpoint} with concurrency {concurrency}")
+        
+        # The first page reported the total, so the remaining pages are fetched
+        # `concurrency` at a time and yielded in skip order
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(skips))) as executor:
+            for page, _, _ in iter_window(executor, fetch_page, skips, concurrency):
+                yield page
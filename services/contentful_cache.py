@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    Persistent SQLite cache for Contentful GET responses, keyed on URL + params.
+    Entries are fresh for `ttl` seconds; stale entries with an ETag are
+    revalidated with If-None-Match instead of being downloaded again.
+    """
+    def __init__(self, path, ttl=3600, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, size INTEGER NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self.connection.commit()
+        self.purge_expired()
+        
+        logger.info(f"Using Contentful response cache at {path} (ttl: {ttl}s, max size: {max_bytes} bytes)")
+    
+    @staticmethod
+    def make_key(url, params=None):
+        """
+        Build a stable cache key from the request URL and query parameters
+        """
+        return "{}?{}".format(url, json.dumps(params or {}, sort_keys=True, default=str))
+    
+    def get(self, key):
+        """
+        Return (body, etag, is_fresh) for a cached response, or None
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT body, etag, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+        
+        body, etag, stored_at = row
+        return bytes(body), etag, time.time() - stored_at < self.ttl
+    
+    def set(self, key, body, etag=None):
+        """
+        Store a response body, evicting least recently used entries if the cache is full
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(body), etag, len(body), now, now)
+            )
+            self._evict_to_size()
+            self.connection.commit()
+    
+    def refresh(self, key):
+        """
+        Mark a revalidated (304 Not Modified) entry as fresh again
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self.connection.commit()
+    
+    def purge_expired(self):
+        """
+        Drop stale entries that cannot be revalidated because they have no ETag
+        """
+        with self.lock:
+            result = self.connection.execute(
+                "DELETE FROM responses WHERE etag IS NULL AND stored_at < ?", (time.time() - self.ttl,)
+            )
+            self.connection.commit()
+        if result.rowcount:
+            logger.info(f"Purged {result.rowcount} expired responses from cache")
+    
+    def _evict_to_size(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes
+        """
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+        
+        evicted = 0
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total_size <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total_size -= size
+            evicted += 1
+        
+        logger.info(f"Evicted {evicted} responses from cache to stay under {self.max_bytes} bytes")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Get the shared response cache, or None if CONTENTFUL_CACHE_PATH is not set
+    """
+    global _cache
+    path = os.getenv("CONTENTFUL_CACHE_PATH")
+    if not path:
+        return None
+    
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                path,
+                ttl=int(os.getenv("CONTENTFUL_CACHE_TTL", "3600")),
+                max_bytes=int(os.getenv("CONTENTFUL_CACHE_MAX_MB", "512")) * 1024 * 1024
+            )
+    return _cache
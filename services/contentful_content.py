@@ -1,5 +1,7 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from services.contentful_base import ContentfulClient
+from core.content_plan import LINK, LINK_ARRAY, RICH_TEXT, compile_transform_plan, is_locale_map, select_locale
 
 logger = logging.getLogger(__name__)
 
@@ -7,57 +9,66 @@ class ContentfulContentService:
     def __init__(self):
         self.client = ContentfulClient()
     
-    def get_all_entries(self, content_type=None, limit=1000):
+    def get_all_entries(self, content_type=None, limit=1000, concurrency=None):
         """
         Get all entries from Contentful, optionally filtered by content type
         """
         if content_type:
             # Use the direct API call with content_type parameter
-            return self._get_entries_by_content_type(content_type, limit)
+            return self._get_entries_by_content_type(content_type, limit, concurrency)
         else:
-            return self.client.get_all_paginated_data("entries")
+            return self.client.get_all_paginated_data("entries", concurrency=concurrency)
     
-    def _get_entries_by_content_type(self, content_type, limit=1000):
+    def _get_entries_by_content_type(self, content_type, limit=1000, concurrency=None):
         """
-        Get all entries for a specific content type using direct API calls
+        Get all entries for a specific content type using direct API calls.
+        A failed page raises, so a partial fetch is never mistaken for all entries.
         """
-        all_items = []
-        skip = 0
-        
-        while True:
-            params = {
-                "content_type": content_type,
-                "limit": min(limit, 1000),  # Contentful max limit is 1000
-                "skip": skip
-            }
-            
-            try:
-                data = self.client.make_request("entries", params)
-                items = data.get("items", [])
-                total = data.get("total", 0)
-                
-                all_items.extend(items)
-                
-                if skip + len(items) >= total or len(items) == 0:
-                    break
-                    
-                skip += len(items)
-                
-            except Exception as e:
-                print("Error fetching entries for content type {}: {}".format(content_type, str(e)))
-                break
+        return self.client.get_all_paginated_data(
+            "entries",
+            limit=min(limit, 1000),  # Contentful max limit is 1000
+            params={"content_type": content_type},
+            concurrency=concurrency
+        )
+    
+    def iter_entries(self, content_type=None, limit=1000, concurrency=None):
+        """
+        Yield entries from Contentful page by page, optionally filtered by content type
+        """
+        for page in self.iter_entry_pages(content_type, limit, concurrency):
+            yield from page
+    
+    def iter_entry_pages(self, content_type=None, limit=1000, concurrency=None, load_page=None):
+        """
+        Yield raw pages of entries, optionally filtered by content type.
+        load_page is passed on to ContentfulClient.iter_pages.
+        """
+        params = {"content_type": content_type} if content_type else None
         
-        return all_items
+        return self.client.iter_pages(
+            "entries",
+            limit=min(limit, 1000),  # Contentful max limit is 1000
+            params=params,
+            concurrency=concurrency,
+            load_page=load_page
+        )
+    
+    def iter_processed_entries(self, content_type=None, limit=1000, concurrency=None, plan=None):
+        """
+        Yield normalized entry information as pages arrive
+        """
+        for entry in self.iter_entries(content_type, limit, concurrency):
+            processed_entry = self.extract_entry_info(entry, plan)
+            if processed_entry:
+                yield processed_entry
     
     def get_entries_batch(self, content_type=None, limit=100, skip=0):
         """
         Get a batch of entries from Contentful
         """
-        params = {"limit": limit, "skip": skip}
-        if content_type:
-            params["content_type"] = content_type
+        params = {"content_type": content_type} if content_type else None
         
-        return self.client.get_paginated_data("entries", **params)
+        return self.client.get_paginated_data("entries", limit=limit, skip=skip, params=params)
     
     def get_entry_by_id(self, entry_id):
         """
@@ -65,9 +76,13 @@ class ContentfulContentService:
         """
         return self.client.get_data("entries/{}".format(entry_id))
     
-    def extract_entry_info(self, entry):
+    @staticmethod
+    def extract_entry_info(entry, plan=None):
         """
-        Extract and normalize entry information from Contentful
+        Extract and normalize entry information from Contentful.
+        With a ContentTypePlan, link and rich text fields are processed by their
+        declared type; other fields take the generic path.
+        Needs no client, so transform processes call it on the class directly.
         """
         try:
             sys_info = entry.get("sys", {})
@@ -79,7 +94,7 @@ class ContentfulContentService:
                 "content_type": sys_info.get("contentType", {}).get("sys", {}).get("id"),
                 "created_at": sys_info.get("createdAt"),
                 "updated_at": sys_info.get("updatedAt"),
-                "version": sys_info.get("version"),
+                "version": sys_info.get("version", sys_info.get("revision")),  # Sync API items carry "revision"
                 "space_id": sys_info.get("space", {}).get("sys", {}).get("id"),
                 "environment_id": sys_info.get("environment", {}).get("sys", {}).get("id"),
             }
@@ -87,7 +102,11 @@ class ContentfulContentService:
             # Process fields with locale handling
             processed_fields = {}
             for field_name, field_value in fields.items():
-                processed_fields[field_name] = self._process_field_value(field_value)
+                field_kind = plan.get_field_kind(field_name) if plan else None
+                if field_kind is None:
+                    processed_fields[field_name] = ContentfulContentService._process_field_value(field_value)
+                else:
+                    processed_fields[field_name] = ContentfulContentService._process_planned_field(field_value, field_kind)
             
             entry_info["fields"] = processed_fields
             
@@ -98,7 +117,8 @@ class ContentfulContentService:
                 entry.get("sys", {}).get("id", "unknown"), str(e)))
             return None
     
-    def _process_field_value(self, field_value):
+    @staticmethod
+    def _process_field_value(field_value):
         """
         Process field values, handling localization and references
         """
@@ -109,15 +129,15 @@ class ContentfulContentService:
                 # Return the first available locale, preferring en-US
                 for locale in ['en-US', 'en', 'en-GB']:
                     if locale in field_value:
-                        return self._process_field_value(field_value[locale])
+                        return ContentfulContentService._process_field_value(field_value[locale])
                 # If no preferred locale, return the first available
                 if field_value:
-                    return self._process_field_value(list(field_value.values())[0])
+                    return ContentfulContentService._process_field_value(list(field_value.values())[0])
                 return None
             
             # Check if it's a reference to another entry or asset
             elif field_value.get("sys", {}).get("type") in ["Link", "Entry", "Asset"]:
-                return self._process_reference(field_value)
+                return ContentfulContentService._process_reference(field_value)
             
             # Regular object, return as-is
             else:
@@ -125,13 +145,44 @@ class ContentfulContentService:
         
         # If it's a list, process each item
         elif isinstance(field_value, list):
-            return [self._process_field_value(item) for item in field_value]
+            return [ContentfulContentService._process_field_value(item) for item in field_value]
         
         # Primitive value, return as-is
         else:
             return field_value
     
-    def _process_reference(self, reference):
+    @staticmethod
+    def _process_planned_field(field_value, field_kind):
+        """
+        Process a field whose type is known from the content type definition.
+        Locale maps are unwrapped under the same check as the generic path, so
+        only the recursion below is skipped, and only for links, rich text and scalars.
+        """
+        if is_locale_map(field_value):
+            field_value = select_locale(field_value)
+        
+        if field_kind == LINK and ContentfulContentService._is_link(field_value):
+            return ContentfulContentService._process_reference(field_value)
+        
+        if field_kind == LINK_ARRAY and isinstance(field_value, list):
+            return [
+                ContentfulContentService._process_reference(item) if ContentfulContentService._is_link(item) else ContentfulContentService._process_field_value(item)
+                for item in field_value
+            ]
+        
+        # JSON objects and arrays may nest anything, so they take the generic path
+        if field_kind != RICH_TEXT and isinstance(field_value, (dict, list)):
+            return ContentfulContentService._process_field_value(field_value)
+        
+        # Scalars and rich text documents are kept as-is
+        return field_value
+    
+    @staticmethod
+    def _is_link(value):
+        return isinstance(value, dict) and value.get("sys", {}).get("type") in ["Link", "Entry", "Asset"]
+    
+    @staticmethod
+    def _process_reference(reference):
         """
         Process Contentful references (links to other entries or assets)
         """
@@ -157,17 +208,17 @@ class ContentfulContentService:
             print("Error processing reference: {}".format(str(e)))
             return reference
     
-    def get_entries_by_content_type(self, content_type, limit=1000):
+    def get_entries_by_content_type(self, content_type, limit=1000, concurrency=None, plan=None):
         """
         Get all entries of a specific content type
         """
         try:
             print("Fetching entries for content type: {}".format(content_type))
-            entries = self.get_all_entries(content_type=content_type, limit=limit)
+            entries = self.get_all_entries(content_type=content_type, limit=limit, concurrency=concurrency)
             
             processed_entries = []
             for entry in entries:
-                processed_entry = self.extract_entry_info(entry)
+                processed_entry = self.extract_entry_info(entry, plan)
                 if processed_entry:
                     processed_entries.append(processed_entry)
             
@@ -176,32 +227,60 @@ class ContentfulContentService:
             
         except Exception as e:
             print("Error getting entries for content type {}: {}".format(content_type, str(e)))
-            return []
+            raise
     
-    def get_all_content_with_types(self, limit=1000):
+    def get_all_content_with_types(self, limit=1000, concurrency=None, max_workers=1):
         """
-        Get all content grouped by content type
+        Get all content grouped by content type.
+        With max_workers > 1, content types are fetched in parallel.
+        A content type whose entries could not be fetched has no entries and
+        carries the error as "fetch_error".
         """
         try:
             # First get all content types
             from services.contentful_schemas import ContentfulSchemasService
             schemas_service = ContentfulSchemasService()
-            content_types = schemas_service.get_all_content_types()
+            content_types = [
+                content_type for content_type in schemas_service.get_all_content_types()
+                if content_type.get("sys", {}).get("id")
+            ]
+            
+            def fetch_content_type(content_type):
+                try:
+                    return self.get_entries_by_content_type(
+                        content_type["sys"]["id"], limit, concurrency, compile_transform_plan(content_type)
+                    ), None
+                except Exception as e:
+                    return [], str(e)
             
             all_content = {}
             
-            for content_type in content_types:
-                content_type_id = content_type.get("sys", {}).get("id")
-                if content_type_id:
-                    entries = self.get_entries_by_content_type(content_type_id, limit)
-                    all_content[content_type_id] = {
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                for content_type, (entries, error) in zip(content_types, executor.map(fetch_content_type, content_types)):
+                    all_content[content_type["sys"]["id"]] = {
                         "content_type_info": content_type,
                         "entries": entries,
                         "count": len(entries)
                     }
+                    if error:
+                        all_content[content_type["sys"]["id"]]["fetch_error"] = error
             
             return all_content
             
         except Exception as e:
             print("Error getting all content with types: {}".format(str(e)))
             return {}
+    
+    def iter_content_with_types(self, limit=1000, concurrency=None):
+        """
+        Yield (content_type_id, content_type_info, entries) for each content type.
+        Entries are a lazy iterator, so only the current page is held in memory.
+        """
+        from services.contentful_schemas import ContentfulSchemasService
+        schemas_service = ContentfulSchemasService()
+        
+        for content_type in schemas_service.get_all_content_types():
+            content_type_id = content_type.get("sys", {}).get("id")
+            if content_type_id:
+                plan = compile_transform_plan(content_type)
+                yield content_type_id, content_type, self.iter_processed_entries(content_type_id, limit, concurrency, plan)
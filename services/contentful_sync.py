@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+from urllib.parse import urlparse, parse_qs
+from services.contentful_base import ContentfulClient
+
+logger = logging.getLogger(__name__)
+
+class ContentfulSyncService:
+    def __init__(self, state_file, item_types=None):
+        self.client = ContentfulClient()
+        self.state_file = state_file
+        # Item types the caller handles (e.g. Entry and DeletedEntry); others are skipped.
+        # This isn't sent as the Sync API "type" filter: the token would keep it for every
+        # later sync, and an Entry or Asset filter leaves out deletions.
+        self.item_types = set(item_types) if item_types else None
+        self.next_sync_token = None
+    
+    def load_sync_token(self):
+        """
+        Load the sync token persisted by the previous run, if any
+        """
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f).get("sync_token")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error loading sync token from {self.state_file}: {str(e)}")
+            return None
+    
+    def save_sync_token(self, sync_token=None):
+        """
+        Persist the sync token so the next run only receives newer changes
+        """
+        sync_token = sync_token or self.next_sync_token
+        if not sync_token:
+            return
+        
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        with open(self.state_file, 'w') as f:
+            json.dump({"sync_token": sync_token}, f, indent=2)
+        logger.info(f"Sync token saved to {self.state_file}")
+    
+    def _extract_sync_token(self, url):
+        """
+        Extract the sync_token query parameter from a nextPageUrl/nextSyncUrl
+        """
+        return parse_qs(urlparse(url).query).get("sync_token", [None])[0]
+    
+    def iter_changes(self):
+        """
+        Yield changed items (Entry, Asset, DeletedEntry, DeletedAsset) since the
+        stored sync token, or the whole space if no token exists yet.
+        With item_types, only items of those types are yielded.
+        The next token is available as `next_sync_token` once iteration ends.
+        """
+        sync_token = self.load_sync_token()
+        if sync_token:
+            print("Running delta sync from stored token")
+            params = {"sync_token": sync_token}
+        else:
+            print("No sync token found - running initial sync")
+            params = {"initial": "true"}
+        
+        self.next_sync_token = None
+        
+        while True:
+            data = self.client.make_sync_request(params)
+            items = data.get("items", [])
+            logger.info(f"Fetched {len(items)} changed items from sync")
+            
+            if self.item_types is None:
+                yield from items
+            else:
+                yield from (item for item in items if self.get_item_type(item) in self.item_types)
+            
+            if data.get("nextPageUrl"):
+                params = {"sync_token": self._extract_sync_token(data["nextPageUrl"])}
+                continue
+            
+            self.next_sync_token = self._extract_sync_token(data.get("nextSyncUrl", ""))
+            break
+    
+    @staticmethod
+    def get_item_type(item):
+        """
+        Get the sync item type (Entry, Asset, DeletedEntry or DeletedAsset)
+        """
+        return item.get("sys", {}).get("type")
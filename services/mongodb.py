@@ -1,7 +1,8 @@
 import os
+from itertools import islice
 from urllib.parse import quote_plus
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import MongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -133,13 +134,81 @@ class MongoDBService:
             print("Error inserting documents into {}: {}".format(collection_name, str(e)))
             return []
     
+    def upsert_document(self, collection_name, document):
+        """
+        Insert or replace a single document by its _id
+        """
+        try:
+            collection = self.get_collection(collection_name)
+            if collection is None:
+                return False
+            
+            collection.replace_one({"_id": document["_id"]}, document, upsert=True)
+            return True
+        except Exception as e:
+            print("Error upserting document into {}: {}".format(collection_name, str(e)))
+            return False
+    
+    def bulk_upsert_documents(self, collection_name, documents, batch_size=1000):
+        """
+        Idempotently load documents with chunked, unordered ReplaceOne upserts keyed on _id.
+        Accepts any iterable, so generators are consumed one chunk at a time.
+        Returns inserted/modified/matched/failed totals plus per-chunk counts.
+        """
+        totals = {"inserted": 0, "modified": 0, "matched": 0, "failed": 0, "chunks": []}
+        
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return totals
+        
+        documents = iter(documents)
+        chunk_number = 0
+        
+        while True:
+            chunk = list(islice(documents, batch_size))
+            if not chunk:
+                break
+            chunk_number += 1
+            
+            operations = [ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in chunk]
+            try:
+                result = collection.bulk_write(operations, ordered=False)
+                chunk_counts = {
+                    "inserted": result.upserted_count,
+                    "modified": result.modified_count,
+                    "matched": result.matched_count,
+                    "failed": 0
+                }
+            except BulkWriteError as e:
+                details = e.details
+                chunk_counts = {
+                    "inserted": details.get("nUpserted", 0),
+                    "modified": details.get("nModified", 0),
+                    "matched": details.get("nMatched", 0),
+                    "failed": len(details.get("writeErrors", []))
+                }
+                for error in details.get("writeErrors", [])[:5]:
+                    print("Write error in {}: {}".format(collection_name, error.get("errmsg")))
+            except Exception as e:
+                print("Error bulk writing chunk {} into {}: {}".format(chunk_number, collection_name, str(e)))
+                chunk_counts = {"inserted": 0, "modified": 0, "matched": 0, "failed": len(chunk)}
+            
+            print("Chunk {} for {}: {} inserted, {} modified, {} failed".format(
+                chunk_number, collection_name, chunk_counts["inserted"], chunk_counts["modified"], chunk_counts["failed"]))
+            
+            for key in ("inserted", "modified", "matched", "failed"):
+                totals[key] += chunk_counts[key]
+            totals["chunks"].append(chunk_counts)
+        
+        return totals
+    
     def find_document(self, collection_name, query):
         """
         Find a single document
         """
         try:
             collection = self.get_collection(collection_name)
-            if not collection:
+            if collection is None:
                 return None
             return collection.find_one(query)
         except Exception as e:
@@ -152,7 +221,7 @@ class MongoDBService:
         """
         try:
             collection = self.get_collection(collection_name)
-            if not collection:
+            if collection is None:
                 return []
             
             query = query or {}
@@ -166,13 +235,28 @@ class MongoDBService:
             print("Error finding documents in {}: {}".format(collection_name, str(e)))
             return []
     
+    def count_documents(self, collection_name, query=None):
+        """
+        Count the documents matching a query.
+        Returns the count, or None if the count failed.
+        """
+        try:
+            collection = self.get_collection(collection_name)
+            if collection is None:
+                return None
+            
+            return collection.count_documents(query or {})
+        except Exception as e:
+            print("Error counting documents in {}: {}".format(collection_name, str(e)))
+            return None
+    
     def update_document(self, collection_name, query, update_data):
         """
         Update a single document
         """
         try:
             collection = self.get_collection(collection_name)
-            if not collection:
+            if collection is None:
                 return False
             
             result = collection.update_one(query, {"$set": update_data})
@@ -188,7 +272,7 @@ class MongoDBService:
         """
         try:
             collection = self.get_collection(collection_name)
-            if not collection:
+            if collection is None:
                 return False
             
             result = collection.delete_one(query)
@@ -198,6 +282,24 @@ class MongoDBService:
             print("Error deleting document from {}: {}".format(collection_name, str(e)))
             return False
     
+    def delete_documents(self, collection_name, query):
+        """
+        Delete all documents matching a query.
+        Returns the deleted count, or None if the delete failed.
+        """
+        try:
+            collection = self.get_collection(collection_name)
+            if collection is None:
+                return None
+            
+            result = collection.delete_many(query)
+            if result.deleted_count:
+                print("Deleted {} document(s) from {}".format(result.deleted_count, collection_name))
+            return result.deleted_count
+        except Exception as e:
+            print("Error deleting documents from {}: {}".format(collection_name, str(e)))
+            return None
+    
     def delete_all_documents(self, collection_name):
         """
         Delete all documents from a collection
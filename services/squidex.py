@@ -1,20 +1,48 @@
-import requests
 import os
 import json
+import hashlib
 from dotenv import load_dotenv
-from config.settings import get_squidex_token, get_headers
+from config.settings import get_squidex_token, get_headers, get_squidex_session
 
 load_dotenv()
 
 SQUIDEX_URL = os.getenv("SQUIDEX_URL", "http://localhost:8080")
 APP_NAME = os.getenv("SQUIDEX_APP_NAME")
+SCHEMA_STATE_FILE = "output/schemas/schema_state.json"
 
+def compute_schema_hash(schema_json):
+    """
+    Canonical hash of a transformed schema: key order and whitespace don't affect it
+    """
+    canonical = json.dumps(schema_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def load_schema_state(state_file=SCHEMA_STATE_FILE):
+    """
+    Load the hashes of the schemas pushed by previous runs
+    """
+    try:
+        with open(state_file, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ Could not read schema state {state_file}: {e}")
+        return {}
+
+def save_schema_state(state, state_file=SCHEMA_STATE_FILE):
+    """
+    Persist pushed schema hashes for change detection on the next run
+    """
+    os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+    with open(state_file, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
 
 def get_schema_id_map():
     url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas"
     token = get_squidex_token()
     headers = get_headers(token)
-    response = requests.get(url, headers=headers)
+    response = get_squidex_session().get(url, headers=headers)
     response.raise_for_status()
 
     return {
@@ -22,14 +50,29 @@ def get_schema_id_map():
         for schema in response.json().get("items", [])
     }
 
+def schema_type_matches(current_schema, schema_json):
+    """
+    Check that an existing schema has the type the transformed schema asks for.
+    Squidex can't change a schema's type in place (e.g. Component schemas from
+    older runs that are now Default), so such schemas have to be deleted and recreated.
+    """
+    current_type = current_schema.get("type")
+    expected_type = schema_json.get("type")
+    if current_type and expected_type and current_type != expected_type:
+        print(f"❌ Schema {schema_json.get('name')} is {current_type} in Squidex but should be {expected_type}; "
+              f"delete it (delete_migrated_schemas.py) and push again")
+        return False
+    return True
+
 def push_schema_to_squidex(schema_json):
     name = schema_json.get("name")
     url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas/{name}"
     token = get_squidex_token()
     headers = get_headers(token)
+    session = get_squidex_session()
 
     # Check if schema already exists
-    get_resp = requests.get(url, headers=headers)
+    get_resp = session.get(url, headers=headers)
 
     if get_resp.status_code == 200:
         print(f"🔄 Schema exists: {name} → Updating...")
@@ -37,6 +80,9 @@ def push_schema_to_squidex(schema_json):
         # Get the current schema to preserve existing structure
         current_schema = get_resp.json()
         
+        if not schema_type_matches(current_schema, schema_json):
+            return None
+        
         # Update the schema with new structure but preserve properties at top level
         updated_schema = schema_json.copy()
         
@@ -50,18 +96,20 @@ def push_schema_to_squidex(schema_json):
             updated_schema["hints"] = hints
 
         
-        put_resp = requests.put(url, headers=headers, data=json.dumps(updated_schema))
+        put_resp = session.put(url, headers=headers, data=json.dumps(updated_schema))
         if put_resp.status_code >= 400:
             print(f"❌ Failed to update schema: {name} ({put_resp.status_code})")
             print(put_resp.text)
+            return None
         else:
             schema_id = get_resp.json().get("id")
             print(f"✅ Successfully updated schema: {name} with label: {label}")
             print(f"   📋 Schema ID: {schema_id}")
             
-            # Update individual Component fields with schemaIds
+            # Update individual References fields with schemaIds
+            failed_fields = []
             for field in updated_schema.get("fields", []):
-                if field.get("properties", {}).get("fieldType") == "Component":
+                if field.get("properties", {}).get("fieldType") == "References":
                     field_name = field.get("name")
                     schema_ids = field.get("properties", {}).get("schemaIds", [])
                     
@@ -78,7 +126,7 @@ def push_schema_to_squidex(schema_json):
                             field_update_url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas/{name}/fields/{field_id}"
                             field_payload = {
                                 "properties": {
-                                    "fieldType": "Component",
+                                    "fieldType": "References",
                                     "schemaIds": schema_ids,
                                     "label": field.get("properties", {}).get("label", field_name),
                                     "isRequired": field.get("properties", {}).get("isRequired", False),
@@ -87,54 +135,134 @@ def push_schema_to_squidex(schema_json):
                                 }
                             }
                             
-                            field_resp = requests.put(field_update_url, headers=headers, data=json.dumps(field_payload))
+                            field_resp = session.put(field_update_url, headers=headers, data=json.dumps(field_payload))
                             
                             if field_resp.status_code == 200:
                                 print(f"   ✅ Updated field {field_name} with {len(schema_ids)} references")
                             else:
                                 print(f"   ❌ Field {field_name} update failed: {field_resp.status_code}")
+                                failed_fields.append(field_name)
             
             # Publish the schema to make changes take effect
             publish_url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas/{name}/publish"
-            publish_resp = requests.put(publish_url, headers=headers)
+            publish_resp = session.put(publish_url, headers=headers)
             if publish_resp.status_code == 200:
                 print(f"   ✅ Schema published successfully")
             else:
                 print(f"   ⚠️ Schema publish failed: {publish_resp.status_code}")
             
             # Verify the schema was updated with correct field properties
-            verify_resp = requests.get(url, headers=headers)
+            verify_resp = session.get(url, headers=headers)
             if verify_resp.status_code == 200:
                 updated_schema_data = verify_resp.json()
                 for field in updated_schema_data.get("fields", []):
-                    if field.get("properties", {}).get("fieldType") == "Component":
+                    if field.get("properties", {}).get("fieldType") == "References":
                         field_name = field.get("name")
                         schema_ids = field.get("properties", {}).get("schemaIds", [])
                         if schema_ids:
                             print(f"   ✅ Field {field_name} has {len(schema_ids)} schema IDs")
                         else:
                             print(f"   ⚠️ Field {field_name} has empty schemaIds")
+            
+            # A partly applied schema must not be recorded as pushed
+            if failed_fields:
+                print(f"❌ Schema {name} not fully updated: {', '.join(failed_fields)} failed")
+                return None
+            return schema_id
 
     else:
-        print(f"➕ Creating new schema: {name}")
-        
-        # Prepare schema for creation with properties at top level
-        create_schema = schema_json.copy()
-        if "properties" in create_schema:
-            label = create_schema["properties"].get("label", name)
-            hints = create_schema["properties"].get("description", "")
-            # Remove only the schema-level properties and add them at top level
-            del create_schema["properties"]
-            create_schema["label"] = label
-            create_schema["hints"] = hints
-        
-        post_url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas"
-        post_resp = requests.post(post_url, headers=headers, data=json.dumps(create_schema))
-        if post_resp.status_code >= 400:
-            print(f"❌ Failed to create schema: {name} ({post_resp.status_code})")
-            print(post_resp.text)
+        return create_schema_in_squidex(schema_json, headers, session)
+
+def create_schema_in_squidex(schema_json, headers, session):
+    name = schema_json.get("name")
+    label = name
+    print(f"➕ Creating new schema: {name}")
+    
+    # Prepare schema for creation with properties at top level
+    create_schema = schema_json.copy()
+    if "properties" in create_schema:
+        label = create_schema["properties"].get("label", name)
+        hints = create_schema["properties"].get("description", "")
+        # Remove only the schema-level properties and add them at top level
+        del create_schema["properties"]
+        create_schema["label"] = label
+        create_schema["hints"] = hints
+    
+    post_url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas"
+    post_resp = session.post(post_url, headers=headers, data=json.dumps(create_schema))
+    if post_resp.status_code >= 400:
+        print(f"❌ Failed to create schema: {name} ({post_resp.status_code})")
+        print(post_resp.text)
+        return None
+    else:
+        created_schema = post_resp.json()
+        schema_id = created_schema.get("id")
+        print(f"✅ Successfully created schema: {name} with label: {label}")
+        print(f"   📋 Schema ID: {schema_id}")
+        return schema_id
+
+def build_sync_payload(schema_json):
+    """
+    Convert a transformed schema into the body of the schema synchronize endpoint.
+    The name is part of the URL and the type can't be changed, so both are left out.
+    Fields missing from the target are kept rather than deleted.
+    """
+    payload = {key: value for key, value in schema_json.items() if key not in ("name", "type", "properties")}
+    
+    properties = dict(schema_json.get("properties", {}))
+    properties["hints"] = properties.pop("description", "")
+    properties.setdefault("label", schema_json.get("name"))
+    payload["properties"] = properties
+    
+    payload["noFieldDeletion"] = True
+    payload["noFieldRecreation"] = True
+    return payload
+
+def sync_schema_to_squidex(schema_json):
+    """
+    Apply the complete schema definition (fields, reference schemaIds, properties
+    and published state) with a single PUT to the synchronize endpoint, and verify
+    the result from its response. Schemas that don't exist yet are created.
+    Returns the schema ID, or None if the push failed.
+    """
+    name = schema_json.get("name")
+    url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/schemas/{name}/sync"
+    token = get_squidex_token()
+    headers = get_headers(token)
+    session = get_squidex_session()
+    
+    sync_resp = session.put(url, headers=headers, data=json.dumps(build_sync_payload(schema_json)))
+    
+    if sync_resp.status_code == 404:
+        return create_schema_in_squidex(schema_json, headers, session)
+    
+    if sync_resp.status_code >= 400:
+        print(f"❌ Failed to sync schema: {name} ({sync_resp.status_code})")
+        print(sync_resp.text)
+        return None
+    
+    synced_schema = sync_resp.json()
+    # The synchronize endpoint keeps the existing type, so a mismatch means the schema wasn't converted
+    if not schema_type_matches(synced_schema, schema_json):
+        return None
+    schema_id = synced_schema.get("id")
+    print(f"✅ Successfully synced schema: {name}")
+    print(f"   📋 Schema ID: {schema_id}")
+    
+    # Verify schema references from the sync response instead of re-reading the schema
+    expected_ids = {
+        field.get("name"): field.get("properties", {}).get("schemaIds", [])
+        for field in schema_json.get("fields", [])
+        if field.get("properties", {}).get("fieldType") == "References"
+    }
+    for field in synced_schema.get("fields", []):
+        field_name = field.get("name")
+        if field_name not in expected_ids:
+            continue
+        schema_ids = field.get("properties", {}).get("schemaIds") or []
+        if set(schema_ids) == set(expected_ids[field_name]):
+            print(f"   ✅ Field {field_name} has {len(schema_ids)} schema IDs")
         else:
-            created_schema = post_resp.json()
-            schema_id = created_schema.get("id")
-            print(f"✅ Successfully created schema: {name} with label: {label}")
-            print(f"   📋 Schema ID: {schema_id}")
+            print(f"   ⚠️ Field {field_name} has {len(schema_ids)} schema IDs, expected {len(expected_ids[field_name])}")
+    
+    return schema_id
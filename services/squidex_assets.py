@@ -0,0 +1,135 @@
+import os
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from config.settings import get_squidex_token, get_squidex_session
+from core.concurrency import iter_window
+from services.contentful_base import get_contentful_session, CONNECT_TIMEOUT, READ_TIMEOUT
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SQUIDEX_URL = os.getenv("SQUIDEX_URL", "http://localhost:8080")
+APP_NAME = os.getenv("SQUIDEX_APP_NAME")
+
+# Namespace for deriving Squidex asset IDs from Contentful asset IDs
+ASSET_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "contentful-asset")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def squidex_asset_id(contentful_id):
+    """
+    Deterministic Squidex asset ID for a Contentful asset ID, so reruns
+    upsert the same asset instead of creating duplicates
+    """
+    return str(uuid.uuid5(ASSET_ID_NAMESPACE, contentful_id))
+
+def multipart_file_body(boundary, file_name, mime_type, chunks):
+    """
+    Yield a multipart/form-data body with a single "file" part whose content
+    comes from chunks, so the file never has to be held in memory
+    """
+    file_name = file_name.replace('"', "")
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+        f"Content-Type: {mime_type}\r\n\r\n"
+    ).encode("utf-8")
+    yield from chunks
+    yield f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+class SquidexAssetUploader:
+    """
+    Streams Contentful assets into the Squidex Assets API.
+    Each download is piped chunk by chunk into a chunked multipart upload,
+    with up to max_workers assets transferring at once.
+    """
+    def __init__(self, max_workers=4):
+        self.max_workers = max(1, max_workers)
+        self.session = get_squidex_session()
+        # Every worker holds a Contentful download connection
+        self.source_session = get_contentful_session(self.max_workers)
+
+    def upload_asset(self, asset_info):
+        """
+        Stream one asset from its Contentful URL into Squidex, upserting it under its derived ID.
+        Returns {"squidex_asset_id", "squidex_file_version"} or None if every attempt failed.
+        """
+        max_retries = 3
+        retry_delay = 2
+
+        url = asset_info.get("url")
+        if not url:
+            print("No URL found for asset {}".format(asset_info.get("asset_id")))
+            return None
+
+        asset_id = squidex_asset_id(asset_info["asset_id"])
+        upload_url = f"{SQUIDEX_URL}/api/apps/{APP_NAME}/assets/{asset_id}"
+
+        for attempt in range(max_retries):
+            try:
+                print("Streaming asset to Squidex (attempt {}/{}): {}".format(attempt + 1, max_retries, url))
+                with self.source_session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as source:
+                    source.raise_for_status()
+                    boundary = uuid.uuid4().hex
+                    body = multipart_file_body(
+                        boundary,
+                        asset_info.get("filename") or asset_id,
+                        asset_info.get("content_type") or "application/octet-stream",
+                        source.iter_content(chunk_size=UPLOAD_CHUNK_SIZE)
+                    )
+                    headers = {
+                        "Authorization": f"Bearer {get_squidex_token()}",
+                        "Content-Type": f"multipart/form-data; boundary={boundary}"
+                    }
+                    # A generator body is sent with chunked transfer encoding
+                    response = self.session.post(upload_url, headers=headers, data=body)
+                    response.raise_for_status()
+
+                created = response.json()
+                return {
+                    "squidex_asset_id": created.get("id", asset_id),
+                    "squidex_file_version": created.get("fileVersion")
+                }
+
+            except Exception as e:
+                print("Squidex upload attempt {} failed: {}".format(attempt + 1, str(e)))
+                if attempt < max_retries - 1:
+                    print("Retrying in {} seconds...".format(retry_delay))
+                    time.sleep(retry_delay)
+                    retry_delay *= 2  # Exponential backoff
+                else:
+                    print("All Squidex upload attempts failed for: {}".format(url))
+                    return None
+
+    def upload_assets_concurrently(self, assets, on_result=None):
+        """
+        Upload assets with at most max_workers transfers in flight.
+        Accepts any iterable, e.g. ContentfulAssetsService.iter_processed_assets().
+        on_result(asset_info, squidex_result) is called as each asset finishes;
+        squidex_result is None on failure. Returns the (succeeded, failed) counts.
+        """
+        succeeded = 0
+        failed = 0
+
+        def process(asset_info):
+            try:
+                squidex_result = self.upload_asset(asset_info)
+            except Exception as e:
+                print("Error processing asset {}: {}".format(asset_info.get("asset_id"), str(e)))
+                squidex_result = None
+            if on_result:
+                on_result(asset_info, squidex_result)
+            return squidex_result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for squidex_result in iter_window(executor, process, assets, self.max_workers):
+                if squidex_result:
+                    succeeded += 1
+                else:
+                    failed += 1
+
+        logger.info(f"Uploaded {succeeded} assets to Squidex ({failed} failed)")
+        return succeeded, failed
@@ -0,0 +1,149 @@
+import os
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from dotenv import load_dotenv
+from config.settings import get_squidex_token, get_headers, get_squidex_session
+from core.concurrency import iter_window
+from core.transformer import camel_case, get_schema_name, transform_content_type
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SQUIDEX_URL = os.getenv("SQUIDEX_URL", "http://localhost:8080")
+APP_NAME = os.getenv("SQUIDEX_APP_NAME")
+
+# Namespace for deriving Squidex content IDs from Contentful entry IDs
+CONTENT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "contentful-entry")
+
+def squidex_content_id(contentful_id):
+    """
+    Deterministic Squidex content ID for a Contentful entry ID.
+    Every run maps an entry to the same ID, so upserts are idempotent and
+    references can point at entries that haven't been loaded yet.
+    """
+    return str(uuid.uuid5(CONTENT_ID_NAMESPACE, contentful_id))
+
+class SquidexContentLoader:
+    """
+    Loads entries produced by ContentfulContentService.extract_entry_info into
+    Squidex through the bulk content endpoint. Entries are sent as batches of
+    Upsert jobs, with up to max_workers batches in flight at once.
+    """
+    def __init__(self, batch_size=100, max_workers=4, publish=True, asset_mapping=None):
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.publish = publish
+        self.asset_mapping = asset_mapping
+        self.session = get_squidex_session()
+
+    def _convert_reference(self, reference, field_type):
+        """
+        Squidex ID for an extracted reference, or None when the field can't hold it:
+        References fields take entries, Assets fields take assets
+        """
+        contentful_id = reference.get("contentful_id")
+        if not contentful_id:
+            return None
+        if field_type == "References" and reference.get("link_type") == "Entry":
+            return squidex_content_id(contentful_id)
+        if field_type == "Assets" and reference.get("link_type") == "Asset" and self.asset_mapping is not None:
+            # Only assets already uploaded to Squidex have an ID to point at
+            asset_info = self.asset_mapping.get(contentful_id)
+            if asset_info and asset_info.get("squidex_asset_id"):
+                return asset_info["squidex_asset_id"]
+        return None
+
+    def _convert_value(self, value, field_type=None):
+        """
+        Convert an extracted field value to Squidex content data for a field
+        of the given Squidex type, rewriting references to Squidex IDs
+        """
+        if field_type in ("References", "Assets"):
+            references = value if isinstance(value, list) else [value]
+            ids = (
+                self._convert_reference(reference, field_type)
+                for reference in references
+                if isinstance(reference, dict) and reference.get("type") == "reference"
+            )
+            return [squidex_id for squidex_id in ids if squidex_id]
+
+        if field_type == "Geolocation" and isinstance(value, dict) and "lat" in value:
+            return {"latitude": value.get("lat"), "longitude": value.get("lon")}
+
+        return value
+
+    def build_job(self, entry_info, field_types=None):
+        """
+        Build the bulk Upsert job for one entry.
+        Fields are renamed as transform_content_type names them and stored invariant.
+        field_types maps those Squidex field names to their field types; fields
+        missing from it are skipped.
+        """
+        data = {}
+        for field_name, value in entry_info.get("fields", {}).items():
+            squidex_name = camel_case(field_name)
+            if field_types is not None and squidex_name not in field_types:
+                continue
+            field_type = field_types.get(squidex_name) if field_types is not None else None
+            data[squidex_name] = {"iv": self._convert_value(value, field_type)}
+
+        return {
+            "type": "Upsert",
+            "id": squidex_content_id(entry_info["contentful_id"]),
+            "data": data
+        }
+
+    def post_batch(self, schema_name, jobs):
+        """
+        Send one batch of jobs to the bulk endpoint.
+        Returns the succeeded/failed job counts.
+        """
+        url = f"{SQUIDEX_URL}/api/content/{APP_NAME}/{schema_name}/bulk"
+        headers = get_headers(get_squidex_token())
+        payload = {
+            "jobs": jobs,
+            "publish": self.publish,
+            "optimizeValidation": True
+        }
+
+        try:
+            response = self.session.post(url, headers=headers, json=payload)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"❌ Bulk request for {schema_name} failed: {e}")
+            return {"succeeded": 0, "failed": len(jobs)}
+
+        errors = [result for result in response.json() if result.get("error")]
+        for result in errors[:5]:
+            print(f"⚠️ {schema_name} job {result.get('jobIndex')}: {result['error'].get('message')}")
+        return {"succeeded": len(jobs) - len(errors), "failed": len(errors)}
+
+    def load_entries(self, content_type_info, entries):
+        """
+        Upsert all entries of one content type.
+        Accepts any iterable of extracted entries, consumed one batch at a time.
+        Returns succeeded/failed totals and the number of batches.
+        """
+        schema_name = get_schema_name(content_type_info)
+        # Values are shaped for the fields of the schema this content type is pushed as;
+        # omitted fields aren't part of it, so they have nowhere to go
+        schema = transform_content_type(content_type_info, {}, resolve_references=False)
+        field_types = {field["name"]: field["properties"]["fieldType"] for field in schema["fields"]}
+
+        totals = {"succeeded": 0, "failed": 0, "batches": 0}
+        jobs = (self.build_job(entry_info, field_types) for entry_info in entries)
+
+        batches = iter(lambda: list(islice(jobs, self.batch_size)), [])
+
+        # Sliding window: at most max_workers batches are built and in flight
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for result in iter_window(executor, lambda batch: self.post_batch(schema_name, batch), batches, self.max_workers):
+                totals["succeeded"] += result["succeeded"]
+                totals["failed"] += result["failed"]
+                totals["batches"] += 1
+
+        logger.info(f"Loaded {totals['succeeded']} entries into {schema_name} ({totals['failed']} failed)")
+        return totals
@@ -0,0 +1,70 @@
+import threading
+
+from click.testing import CliRunner
+
+import contentful_s3_assets_migration
+from services.asset_pipeline import AssetMigrationPipeline
+
+
+class FakeContentfulService:
+    def __init__(self, assets):
+        self.assets = assets
+
+    def iter_processed_assets(self):
+        return iter(self.assets)
+
+
+class FakeS3Service:
+    def __init__(self, unchanged):
+        self.unchanged = set(unchanged)
+        self.downloaded = []
+
+    def is_asset_unchanged(self, asset_info):
+        return asset_info["asset_id"] in self.unchanged
+
+    def build_skipped_result(self, asset_info):
+        return {"s3_key": "assets/" + asset_info["asset_id"], "skipped": True}
+
+    def download_asset_to_spool(self, url):
+        self.downloaded.append(url)
+        return "spool", "digest"
+
+    def upload_spooled_asset(self, asset_info, spool, digest, content_addressed):
+        return {"s3_key": "assets/" + asset_info["asset_id"]}
+
+
+ASSETS = [{"asset_id": "a{}".format(i), "url": "https://cdn/a{}".format(i)} for i in range(5)]
+
+
+def test_skip_existing_bypasses_transfers_and_results_are_emitted_off_the_loop():
+    s3_service = FakeS3Service(unchanged={"a1", "a3"})
+    loop_thread = threading.get_ident()
+    emitted = []
+
+    def on_result(asset_info, s3_result):
+        emitted.append((asset_info["asset_id"], s3_result, threading.get_ident()))
+
+    pipeline = AssetMigrationPipeline(FakeContentfulService(ASSETS), s3_service, download_workers=2,
+                                      upload_workers=2, queue_size=2, skip_existing=True)
+    results = pipeline.run(on_result=on_result)
+
+    assert len(results) == 5
+    assert sorted(s3_service.downloaded) == ["https://cdn/a0", "https://cdn/a2", "https://cdn/a4"]
+    assert sorted(asset_id for asset_id, s3_result, _ in emitted if s3_result.get("skipped")) == ["a1", "a3"]
+    assert all(thread != loop_thread for _, _, thread in emitted)
+
+
+def test_content_addressed_pipeline_ignores_skip_existing():
+    s3_service = FakeS3Service(unchanged={"a1"})
+    pipeline = AssetMigrationPipeline(FakeContentfulService(ASSETS), s3_service, skip_existing=True,
+                                      content_addressed=True)
+    pipeline.run()
+    assert len(s3_service.downloaded) == 5
+
+
+def test_pipeline_rejects_options_it_would_ignore():
+    runner = CliRunner()
+    for args in (["--pipeline", "--stream"], ["--pipeline", "--workers", "8"]):
+        result = runner.invoke(contentful_s3_assets_migration.migrate, args)
+        assert result.exit_code == 2
+        assert "--pipeline" in result.output
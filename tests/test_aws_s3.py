@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from services.aws_s3 import S3AssetService
+
+
+class FakeS3Client:
+    def __init__(self, objects):
+        self.objects = objects
+        self.heads = []
+
+    def head_object(self, Bucket, Key):
+        self.heads.append(Key)
+        return {"Metadata": self.objects[Key]}
+
+
+ASSET = {
+    "asset_id": "asset-1",
+    "title": "Hero",
+    "filename": "hero.png",
+    "size": 100,
+    "updated_at": "2025-06-01T10:00:00.000Z",
+}
+KEY = "assets/Hero_hero.png"
+
+
+@pytest.fixture
+def s3_service():
+    service = S3AssetService()
+    service.bucket_index = {KEY: {"size": 100, "etag": "e", "last_modified": datetime(2025, 6, 2, tzinfo=timezone.utc)}}
+    return service
+
+
+def with_metadata(service, metadata):
+    service.s3_client = FakeS3Client({KEY: metadata})
+    return service
+
+
+def test_same_asset_and_version_is_unchanged(s3_service):
+    with_metadata(s3_service, {"asset-id": "asset-1", "updated-at": ASSET["updated_at"]})
+    assert s3_service.is_asset_unchanged(ASSET)
+
+
+def test_colliding_key_of_another_asset_is_not_skipped(s3_service):
+    with_metadata(s3_service, {"asset-id": "asset-2", "updated-at": ASSET["updated_at"]})
+    assert not s3_service.is_asset_unchanged(ASSET)
+
+
+def test_updated_asset_is_not_skipped(s3_service):
+    with_metadata(s3_service, {"asset-id": "asset-1", "updated-at": "2025-05-01T10:00:00.000Z"})
+    assert not s3_service.is_asset_unchanged(ASSET)
+
+
+def test_objects_without_stored_updated_at_fall_back_to_last_modified(s3_service):
+    with_metadata(s3_service, {"asset-id": "asset-1"})
+    assert s3_service.is_asset_unchanged(ASSET)
+    assert not s3_service.is_asset_unchanged({**ASSET, "updated_at": "2025-06-03T00:00:00Z"})
+
+
+def test_index_miss_needs_no_request(s3_service):
+    with_metadata(s3_service, {})
+    assert not s3_service.is_asset_unchanged({**ASSET, "size": 101})
+    assert not s3_service.is_asset_unchanged({**ASSET, "title": "Other"})
+    assert s3_service.s3_client.heads == []
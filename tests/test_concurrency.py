@@ -0,0 +1,44 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.concurrency import iter_window
+
+
+def test_results_keep_item_order():
+    def slow_for_small(n):
+        time.sleep(0.01 * (5 - n))
+        return n * 10
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        assert list(iter_window(executor, slow_for_small, range(5), 5)) == [0, 10, 20, 30, 40]
+
+
+def test_at_most_window_items_are_pulled_ahead():
+    pulled = []
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def items():
+        for n in range(10):
+            pulled.append(n)
+            yield n
+
+    def work(n):
+        with lock:
+            running.append(n)
+            peak.append(len(running))
+        time.sleep(0.005)
+        with lock:
+            running.remove(n)
+        return n
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = iter_window(executor, work, items(), 3)
+        assert next(results) == 0
+        # The first result was handed out after refilling one slot
+        assert len(pulled) == 4
+        assert list(results) == list(range(1, 10))
+
+    assert max(peak) <= 3
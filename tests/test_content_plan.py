@@ -0,0 +1,98 @@
+import pytest
+
+from core.content_plan import compile_transform_plan
+from core.content_transformer import ContentTransformer
+from services.contentful_content import ContentfulContentService
+
+
+def link(link_type, item_id):
+    return {"sys": {"type": "Link", "linkType": link_type, "id": item_id}}
+
+
+CONTENT_TYPE = {
+    "sys": {"id": "article"},
+    "fields": [
+        {"id": "title", "type": "Symbol", "localized": True},
+        {"id": "body", "type": "RichText"},
+        {"id": "author", "type": "Link", "linkType": "Entry"},
+        {"id": "hero", "type": "Link", "linkType": "Asset"},
+        {"id": "related", "type": "Array", "items": {"type": "Link", "linkType": "Entry"}},
+        {"id": "tags", "type": "Array", "items": {"type": "Symbol"}},
+        {"id": "meta", "type": "Object"},
+        {"id": "location", "type": "Location"},
+    ]
+}
+
+RICH_TEXT = {
+    "nodeType": "document",
+    "data": {},
+    "content": [{"nodeType": "embedded-entry-block", "data": {"target": link("Entry", "e9")}, "content": []}]
+}
+
+ENTRIES = [
+    # Preferred locales
+    {
+        "sys": {"id": "a1", "contentType": {"sys": {"id": "article"}}},
+        "fields": {
+            "title": {"en-US": "Hello", "de-DE": "Hallo"},
+            "body": {"en-US": RICH_TEXT},
+            "author": {"en-US": link("Entry", "e1")},
+            "hero": {"en-US": link("Asset", "as1")},
+            "related": {"en-US": [link("Entry", "e2"), link("Entry", "e3")]},
+            "tags": {"en-US": ["a", "b"]},
+            "meta": {"en-US": {"see": {"type": "reference", "link_type": "Asset", "contentful_id": "as2"},
+                               "en": "nested locale-like key"}},
+            "location": {"en-US": {"lat": 52.5, "lon": 13.4}},
+        }
+    },
+    # Only non-preferred locales
+    {
+        "sys": {"id": "a2", "contentType": {"sys": {"id": "article"}}},
+        "fields": {
+            "title": {"de-DE": "Hallo", "fr-FR": "Bonjour"},
+            "author": {"de-DE": link("Entry", "e1")},
+            "related": {"de-DE": [link("Entry", "e2")]},
+            "meta": {"de-DE": {"items": [{"type": "reference", "link_type": "Entry", "contentful_id": "e4"}]}},
+        }
+    },
+    # Already unwrapped values, plus a field the definition doesn't declare
+    {
+        "sys": {"id": "a3", "contentType": {"sys": {"id": "article"}}},
+        "fields": {
+            "title": "Plain",
+            "author": link("Entry", "e1"),
+            "related": [link("Entry", "e2"), "not-a-link"],
+            "meta": {"nested": [link("Asset", "as1")], "ref": {"type": "reference", "link_type": "Entry", "contentful_id": "e5"}},
+            "extra": {"en-GB": link("Asset", "as3")},
+        }
+    },
+]
+
+ASSET_MAPPING = {
+    "as1": {"s3_url": "https://bucket/as1.png", "s3_key": "as1.png", "original_url": "//cdn/as1.png"},
+    "as2": {"s3_url": "https://bucket/as2.png", "s3_key": "as2.png", "original_url": "//cdn/as2.png"},
+}
+
+
+@pytest.fixture
+def content_service(monkeypatch):
+    monkeypatch.setenv("CONTENTFUL_SPACE_ID", "space")
+    monkeypatch.delenv("CONTENTFUL_CACHE_PATH", raising=False)
+    return ContentfulContentService()
+
+
+@pytest.mark.parametrize("entry", ENTRIES, ids=[entry["sys"]["id"] for entry in ENTRIES])
+def test_plan_output_matches_generic_path(content_service, entry):
+    plan = compile_transform_plan(CONTENT_TYPE)
+    transformer = ContentTransformer(run_id="run")
+
+    generic = content_service.extract_entry_info(entry)
+    planned = content_service.extract_entry_info(entry, plan)
+    assert planned == generic
+
+    generic_document = transformer.transform_content_for_mongodb(generic, ASSET_MAPPING)
+    planned_document = transformer.transform_content_for_mongodb(planned, ASSET_MAPPING, plan)
+    generic_document["migration_metadata"].pop("migrated_at")
+    planned_document["migration_metadata"].pop("migrated_at")
+    assert planned_document == generic_document
+
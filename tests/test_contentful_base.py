@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import services.contentful_base as contentful_base
+import services.contentful_schemas as contentful_schemas
+from services.contentful_base import ContentfulClient
+from services.contentful_content import ContentfulContentService
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(body or {}).encode("utf-8")
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError("HTTP {}".format(self.status_code))
+
+
+class FakeSession:
+    """Answers entries requests from a {skip: [responses]} script"""
+    def __init__(self, script):
+        self.script = script
+        self.requests = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.requests.append(dict(params or {}))
+        return self.script[params["skip"]].pop(0)
+
+
+def page(skip, total, count):
+    return FakeResponse(200, {"items": [{"sys": {"id": "e{}".format(skip + i)}} for i in range(count)], "total": total})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    monkeypatch.setenv("CONTENTFUL_SPACE_ID", "space")
+    monkeypatch.delenv("CONTENTFUL_CACHE_PATH", raising=False)
+    sleeps = []
+    monkeypatch.setattr(contentful_base.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def client_with(script):
+    client = ContentfulClient()
+    client.cache = None
+    client.session = FakeSession(script)
+    return client
+
+
+def test_rate_limited_pages_are_retried(sleeps):
+    client = client_with({
+        0: [page(0, 4, 2)],
+        2: [FakeResponse(429, headers={"X-Contentful-RateLimit-Reset": "3"}), FakeResponse(429), page(2, 4, 2)],
+    })
+
+    items = client.get_all_paginated_data("entries", limit=2, concurrency=2)
+
+    assert [item["sys"]["id"] for item in items] == ["e0", "e1", "e2", "e3"]
+    assert sleeps == [3.0, contentful_base.RETRY_BACKOFF * 2]
+
+
+def test_rate_limit_gives_up_after_max_retries(sleeps, monkeypatch):
+    monkeypatch.setattr(contentful_base, "MAX_RETRIES", 2)
+    client = client_with({0: [FakeResponse(429, headers={"Retry-After": "1"}) for _ in range(3)]})
+
+    with pytest.raises(RuntimeError):
+        client.get_paginated_data("entries", limit=2)
+    assert sleeps == [1.0, 1.0]
+
+
+def test_failed_fetch_marks_the_content_type_instead_of_emptying_it(sleeps, monkeypatch):
+    class FakeSchemasService:
+        def get_all_content_types(self):
+            return [{"sys": {"id": "article"}}, {"sys": {"id": "author"}}]
+
+    monkeypatch.setattr(contentful_schemas, "ContentfulSchemasService", FakeSchemasService)
+    service = ContentfulContentService()
+    service.client = client_with({0: [page(0, 4, 2), page(0, 1, 1)], 2: [FakeResponse(500)]})
+
+    content = service.get_all_content_with_types(limit=2)
+
+    assert content["article"]["entries"] == [] and "HTTP 500" in content["article"]["fetch_error"]
+    assert content["author"]["count"] == 1 and "fetch_error" not in content["author"]
+
+def test_session_pool_grows_to_the_worker_count(monkeypatch):
+    monkeypatch.setattr(contentful_base, "_session", None)
+    monkeypatch.setattr(contentful_base, "_session_pool_size", 0)
+    
+    session = contentful_base.get_contentful_session()
+    assert session.get_adapter("https://cdn.contentful.com")._pool_maxsize == contentful_base.POOL_SIZE
+    
+    grown = contentful_base.get_contentful_session(contentful_base.POOL_SIZE + 6)
+    assert grown is session
+    assert session.get_adapter("https://cdn.contentful.com")._pool_maxsize == contentful_base.POOL_SIZE + 6
+    
+    # A smaller request never shrinks the pool other callers rely on
+    contentful_base.get_contentful_session(2)
+    assert session.get_adapter("https://cdn.contentful.com")._pool_maxsize == contentful_base.POOL_SIZE + 6
@@ -0,0 +1,140 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from services.contentful_sync import ContentfulSyncService
+
+
+class FakeSyncServer:
+    """
+    Minimal Contentful Sync endpoint. `pages` maps the sync token a request
+    carries ("initial" for the initial sync) to the response body.
+    """
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                fake.requests.append(query)
+                body = fake.pages.get(query.get("sync_token", "initial"))
+                if body is None:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:{}".format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def sync_url(base, kind, token):
+    return "{}/spaces/space/environments/master/sync?sync_token={}".format(base, token)
+
+
+def item(item_type, item_id):
+    return {"sys": {"type": item_type, "id": item_id}}
+
+
+@pytest.fixture
+def sync_env(monkeypatch):
+    monkeypatch.setenv("CONTENTFUL_SPACE_ID", "space")
+    monkeypatch.setenv("CONTENTFUL_ENVIRONMENT_ID", "master")
+    monkeypatch.setenv("CONTENTFUL_DELIVERY_TOKEN", "delivery-token")
+    monkeypatch.delenv("CONTENTFUL_CACHE_PATH", raising=False)
+    return monkeypatch
+
+
+def make_service(sync_env, server, tmp_path, item_types=None):
+    sync_env.setenv("CONTENTFUL_SYNC_URL", server.url)
+    return ContentfulSyncService(str(tmp_path / "sync" / "token.json"), item_types=item_types)
+
+
+def test_initial_sync_follows_next_page_url_and_stores_next_sync_token(sync_env, tmp_path):
+    pages = {}
+    with FakeSyncServer(pages) as server:
+        pages["initial"] = {
+            "items": [item("Asset", "a1"), item("Entry", "e1"), item("Asset", "a2")],
+            "nextPageUrl": sync_url(server.url, "page", "page-2")
+        }
+        pages["page-2"] = {
+            "items": [item("DeletedAsset", "a3"), item("DeletedEntry", "e2")],
+            "nextSyncUrl": sync_url(server.url, "sync", "delta-1")
+        }
+
+        service = make_service(sync_env, server, tmp_path, item_types=("Asset", "DeletedAsset"))
+        items = list(service.iter_changes())
+
+    assert [i["sys"]["id"] for i in items] == ["a1", "a2", "a3"]
+    # No type filter: the token would keep it, and Entry/Asset filters leave out deletions
+    assert server.requests[0] == {"initial": "true"}
+    assert server.requests[1] == {"sync_token": "page-2"}
+    assert service.next_sync_token == "delta-1"
+
+    service.save_sync_token()
+    assert service.load_sync_token() == "delta-1"
+
+
+def test_delta_sync_yields_deletions_of_handled_types(sync_env, tmp_path):
+    pages = {}
+    with FakeSyncServer(pages) as server:
+        pages["delta-1"] = {
+            "items": [item("Entry", "e1"), item("Asset", "a1"), item("DeletedAsset", "a2"), item("DeletedEntry", "e2")],
+            "nextSyncUrl": sync_url(server.url, "sync", "delta-2")
+        }
+
+        service = make_service(sync_env, server, tmp_path, item_types=("Entry", "DeletedEntry"))
+        service.save_sync_token("delta-1")
+        items = list(service.iter_changes())
+
+    assert server.requests == [{"sync_token": "delta-1"}]
+    assert [service.get_item_type(i) for i in items] == ["Entry", "DeletedEntry"]
+    assert service.next_sync_token == "delta-2"
+
+
+def test_next_sync_token_is_only_set_once_iteration_completes(sync_env, tmp_path):
+    pages = {}
+    with FakeSyncServer(pages) as server:
+        pages["initial"] = {
+            "items": [item("Entry", "e1")],
+            "nextPageUrl": sync_url(server.url, "page", "page-2")
+        }
+        pages["page-2"] = {"items": [], "nextSyncUrl": sync_url(server.url, "sync", "delta-1")}
+
+        service = make_service(sync_env, server, tmp_path)
+        changes = service.iter_changes()
+        next(changes)
+        assert service.next_sync_token is None
+        list(changes)
+
+    assert server.requests[0] == {"initial": "true"}
+    assert service.next_sync_token == "delta-1"
+
+
+def test_save_sync_token_without_token_writes_nothing(sync_env, tmp_path):
+    with FakeSyncServer({}) as server:
+        service = make_service(sync_env, server, tmp_path)
+    service.save_sync_token()
+    assert service.load_sync_token() is None
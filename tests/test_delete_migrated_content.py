@@ -0,0 +1,65 @@
+from delete_migrated_content import delete_run
+
+
+class FakeMongoDBService:
+    def __init__(self, collections, failing=(), other_runs=None):
+        self.manifest = {"run_id": "run-1", "collections": collections}
+        self.failing = set(failing)
+        # Documents of other runs per collection
+        self.other_runs = other_runs or {}
+        self.updates = []
+        self.dropped = []
+        self.deleted_from = []
+
+    def find_document(self, collection_name, query):
+        return self.manifest if query == {"run_id": "run-1"} else None
+
+    def delete_documents(self, collection_name, query):
+        assert query == {"migration_metadata.run_id": "run-1"}
+        if collection_name in self.failing:
+            return None
+        self.deleted_from.append(collection_name)
+        return 3
+
+    def count_documents(self, collection_name, query):
+        assert query == {"migration_metadata.run_id": {"$ne": "run-1"}}
+        return self.other_runs.get(collection_name, 0)
+
+    def drop_collection(self, collection_name):
+        self.dropped.append(collection_name)
+        return True
+
+    def update_document(self, collection_name, query, update_data):
+        self.updates.append(update_data)
+        return True
+
+
+def test_delete_run_marks_manifest_when_every_collection_is_cleared():
+    mongodb_service = FakeMongoDBService(["articles", "authors"])
+
+    assert delete_run(mongodb_service, "run-1", workers=2)
+    assert len(mongodb_service.updates) == 1
+    assert "rolled_back_at" in mongodb_service.updates[0]
+
+
+def test_delete_run_reports_failed_collections_without_marking_rollback():
+    mongodb_service = FakeMongoDBService(["articles", "authors", "pages"], failing={"authors"})
+
+    assert not delete_run(mongodb_service, "run-1", workers=2)
+    assert len(mongodb_service.updates) == 1
+    assert "rolled_back_at" not in mongodb_service.updates[0]
+    assert mongodb_service.updates[0]["rollback_failed_collections"] == ["authors"]
+
+
+def test_delete_run_without_manifest():
+    assert not delete_run(FakeMongoDBService([]), "other-run")
+
+
+def test_drop_collections_only_drops_collections_holding_just_this_run():
+    mongodb_service = FakeMongoDBService(["articles", "authors", "pages"], other_runs={"authors": 12})
+
+    assert delete_run(mongodb_service, "run-1", drop_collections=True, workers=2)
+    assert sorted(mongodb_service.dropped) == ["articles", "pages"]
+    # The mixed collection only loses this run's documents
+    assert mongodb_service.deleted_from == ["authors"]
+    assert mongodb_service.updates[0]["rolled_back_by_drop"] is True
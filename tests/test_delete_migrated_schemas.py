@@ -0,0 +1,65 @@
+from click.testing import CliRunner
+
+import delete_migrated_schemas
+from core.transformer import MIGRATED_SCHEMA_TAG
+
+
+def schema(name, references=(), tags=(MIGRATED_SCHEMA_TAG,)):
+    return {
+        "id": name + "-id",
+        "name": name,
+        "type": "Default",
+        "properties": {"tags": list(tags)},
+        "fields": [{"name": "links", "properties": {"fieldType": "References",
+                                                     "schemaIds": [ref + "-id" for ref in references]}}]
+    }
+
+
+def run(monkeypatch, schemas, failing=()):
+    deleted = []
+
+    def delete_schema(name, headers):
+        if name in failing:
+            return False
+        deleted.append(name)
+        return True
+
+    monkeypatch.setattr(delete_migrated_schemas, "get_squidex_token", lambda: "token")
+    monkeypatch.setattr(delete_migrated_schemas, "get_schemas", lambda headers: schemas)
+    monkeypatch.setattr(delete_migrated_schemas, "delete_schema", delete_schema)
+    result = CliRunner().invoke(delete_migrated_schemas.main, ["--workers", "2"])
+    assert result.exit_code == 0, result.output
+    return deleted, result.output
+
+
+def test_referencing_schemas_are_deleted_first(monkeypatch):
+    schemas = [schema("author"), schema("article", ["author", "tag"]), schema("tag"), schema("page", ["article"])]
+    deleted, _ = run(monkeypatch, schemas)
+
+    assert deleted.index("page") < deleted.index("article") < deleted.index("author")
+    assert deleted.index("article") < deleted.index("tag")
+
+
+def test_schemas_referenced_by_a_failed_delete_are_skipped(monkeypatch):
+    schemas = [
+        schema("page", ["article"]),
+        schema("article", ["author"]),
+        schema("author"),
+        schema("footer", ["tag"]),
+        schema("tag"),
+        schema("manual", tags=()),  # Not migrated
+    ]
+    deleted, output = run(monkeypatch, schemas, failing={"page"})
+
+    assert sorted(deleted) == ["footer", "tag"]
+    assert "1 schemas could not be deleted: page" in output
+    assert "2 schemas skipped" in output
+    assert "article" in output and "author" in output
+
+
+def test_cycle_members_behind_a_failed_delete_are_skipped(monkeypatch):
+    schemas = [schema("a", ["b"]), schema("b", ["a"]), schema("c", ["a"])]
+    deleted, output = run(monkeypatch, schemas, failing={"a"})
+
+    assert deleted == ["c"]
+    assert "Skipping b: still referenced by a" in output
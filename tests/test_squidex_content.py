@@ -0,0 +1,171 @@
+import uuid
+
+import pytest
+
+from core.transformer import transform_content_type
+from services.squidex_content import SquidexContentLoader, squidex_content_id
+
+
+CONTENT_TYPE = {
+    "sys": {"id": "article"},
+    "name": "Article",
+    "fields": [
+        {"id": "title", "name": "Title", "type": "Symbol"},
+        {"id": "summary", "name": "Summary", "type": "Text"},
+        {"id": "body", "name": "Body", "type": "RichText"},
+        {"id": "tags", "name": "Tags", "type": "Array", "items": {"type": "Symbol"}},
+        {"id": "status", "name": "Status", "type": "Symbol", "validations": [{"in": ["draft", "live"]}]},
+        {"id": "featured", "name": "Featured", "type": "Boolean"},
+        {"id": "rating", "name": "Rating", "type": "Integer"},
+        {"id": "author", "name": "Author", "type": "Link", "linkType": "Entry"},
+        {"id": "hero_image", "name": "Hero image", "type": "Link", "linkType": "Asset"},
+        {"id": "related", "name": "Related", "type": "Array",
+         "items": {"type": "Link", "linkType": "Entry", "validations": [{"linkContentType": ["author"]}]}},
+        {"id": "gallery", "name": "Gallery", "type": "Array", "items": {"type": "Link", "linkType": "Asset"}},
+        {"id": "location", "name": "Location", "type": "Location"},
+        {"id": "meta", "name": "Meta", "type": "Object"},
+        {"id": "legacy", "name": "Legacy", "type": "Symbol", "omitted": True},
+    ]
+}
+
+SCHEMA_ID_MAP = {"author": "author-schema-id"}
+
+ASSET_MAPPING = {
+    "as1": {"squidex_asset_id": "squidex-as1"},
+    "as2": {"squidex_asset_id": "squidex-as2"},
+    "as3": {"s3_url": "https://bucket/as3.png"},  # Not uploaded to Squidex
+}
+
+
+def reference(link_type, contentful_id):
+    return {"type": "reference", "link_type": link_type, "contentful_id": contentful_id}
+
+
+ENTRIES = [
+    {
+        "contentful_id": "a1",
+        "fields": {
+            "title": "Hello",
+            "summary": "Some *markdown*\n\nover two paragraphs",
+            "body": {"nodeType": "document", "data": {}, "content": [
+                {"nodeType": "paragraph", "data": {}, "content": [{"nodeType": "text", "value": "Hi", "marks": [], "data": {}}]}
+            ]},
+            "tags": ["news", "cars"],
+            "status": "live",
+            "featured": True,
+            "rating": 4,
+            "author": reference("Entry", "e1"),
+            "hero_image": reference("Asset", "as1"),
+            "related": [reference("Entry", "e2"), reference("Entry", "e3")],
+            "gallery": [reference("Asset", "as2"), reference("Asset", "as3")],
+            "location": {"lat": 52.52, "lon": 13.40},
+            "meta": {"key": "value"},
+            "legacy": "dropped",
+        }
+    },
+    {
+        "contentful_id": "a2",
+        "fields": {
+            "title": "No links",
+            "author": reference("Asset", "as1"),  # Wrong link type for a References field
+            "gallery": [reference("Entry", "e1")],  # Wrong link type for an Assets field
+        }
+    },
+]
+
+
+def is_uuid(value):
+    try:
+        uuid.UUID(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def assert_valid_value(field, value):
+    """Check a job value against the field definition of the transformed schema"""
+    properties = field["properties"]
+    field_type = properties["fieldType"]
+    if field_type == "References":
+        assert isinstance(value, list) and all(is_uuid(item) for item in value)
+        assert len(value) <= properties.get("maxItems", len(value))
+    elif field_type == "Assets":
+        assert isinstance(value, list) and all(item in ("squidex-as1", "squidex-as2") for item in value)
+        assert len(value) <= properties.get("maxItems", len(value))
+    elif field_type == "Geolocation":
+        assert set(value) == {"latitude", "longitude"}
+    elif field_type == "String":
+        assert isinstance(value, str)
+        if properties.get("editor") == "Dropdown":
+            assert value in properties["allowedValues"]
+    elif field_type == "Tags":
+        assert isinstance(value, list) and all(isinstance(item, str) for item in value)
+    elif field_type == "Json":
+        assert isinstance(value, dict)
+    elif field_type == "Boolean":
+        assert isinstance(value, bool)
+    elif field_type == "Number":
+        assert isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        pytest.fail("No check for Squidex field type {}".format(field_type))
+
+
+@pytest.fixture
+def loaded_jobs(monkeypatch):
+    loader = SquidexContentLoader(batch_size=1, max_workers=2, asset_mapping=ASSET_MAPPING)
+    posted = []
+
+    def post_batch(schema_name, jobs):
+        posted.append((schema_name, jobs))
+        return {"succeeded": len(jobs), "failed": 0}
+
+    monkeypatch.setattr(loader, "post_batch", post_batch)
+    totals = loader.load_entries(CONTENT_TYPE, iter(ENTRIES))
+    assert totals == {"succeeded": 2, "failed": 0, "batches": 2}
+    return {job["id"]: (schema_name, job) for schema_name, jobs in posted for job in jobs}
+
+
+def test_transformed_schema_accepts_content():
+    schema = transform_content_type(CONTENT_TYPE, SCHEMA_ID_MAP)
+    fields = {field["name"]: field["properties"] for field in schema["fields"]}
+
+    assert schema["type"] == "Default"
+    assert fields["author"]["fieldType"] == "References" and fields["author"]["maxItems"] == 1
+    assert fields["related"]["fieldType"] == "References"
+    assert fields["related"]["schemaIds"] == ["author-schema-id"]
+    assert fields["heroImage"]["fieldType"] == "Assets" and fields["heroImage"]["maxItems"] == 1
+    assert fields["gallery"]["fieldType"] == "Assets"
+    assert fields["location"]["fieldType"] == "Geolocation"
+    assert fields["summary"]["fieldType"] == "String" and fields["summary"]["editor"] == "TextArea"
+    assert fields["body"]["fieldType"] == "Json"
+    assert fields["tags"]["fieldType"] == "Tags"
+    assert "legacy" not in fields
+    assert "Component" not in {properties["fieldType"] for properties in fields.values()}
+
+
+def test_loader_output_matches_transformed_schema(loaded_jobs):
+    schema = transform_content_type(CONTENT_TYPE, SCHEMA_ID_MAP)
+    schema_fields = {field["name"]: field for field in schema["fields"]}
+
+    for schema_name, job in loaded_jobs.values():
+        assert schema_name == schema["name"]
+        for field_name, value in job["data"].items():
+            assert field_name in schema_fields
+            assert set(value) == {"iv"}
+            assert_valid_value(schema_fields[field_name], value["iv"])
+
+
+def test_loader_converts_references_assets_and_locations(loaded_jobs):
+    _, job = loaded_jobs[squidex_content_id("a1")]
+    data = {name: value["iv"] for name, value in job["data"].items()}
+
+    assert data["author"] == [squidex_content_id("e1")]
+    assert data["related"] == [squidex_content_id("e2"), squidex_content_id("e3")]
+    assert data["heroImage"] == ["squidex-as1"]
+    assert data["gallery"] == ["squidex-as2"]
+    assert data["location"] == {"latitude": 52.52, "longitude": 13.40}
+    assert "legacy" not in data
+
+    _, job = loaded_jobs[squidex_content_id("a2")]
+    assert job["data"]["author"] == {"iv": []}
+    assert job["data"]["gallery"] == {"iv": []}
@@ -0,0 +1,67 @@
+import pytest
+
+import services.squidex as squidex
+from contentful_squidx_schemas_migration import push_if_changed
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.text = str(self.body)
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Serves one existing schema and records every write"""
+    def __init__(self, existing):
+        self.existing = existing
+        self.writes = []
+
+    def get(self, url, headers=None):
+        return FakeResponse(200, self.existing)
+
+    def put(self, url, headers=None, data=None):
+        self.writes.append(url)
+        return FakeResponse(200, self.existing)
+
+
+SCHEMA = {
+    "name": "article",
+    "type": "Default",
+    "fields": [{"name": "title", "properties": {"fieldType": "String"}}],
+    "properties": {"label": "Article", "description": "", "tags": []}
+}
+
+
+@pytest.fixture
+def existing_component_schema(monkeypatch):
+    session = FakeSession({"id": "article-id", "name": "article", "type": "Component", "fields": []})
+    monkeypatch.setattr(squidex, "get_squidex_session", lambda: session)
+    monkeypatch.setattr(squidex, "get_squidex_token", lambda: "token")
+    return session
+
+
+@pytest.mark.parametrize("push", [squidex.push_schema_to_squidex, squidex.sync_schema_to_squidex])
+def test_type_mismatch_fails_the_push_and_is_not_recorded(existing_component_schema, push):
+    schema_state = {}
+    sent, schema_id = push_if_changed(SCHEMA, "resolved", schema_state, {"article": "article-id"}, push=push)
+
+    assert sent and schema_id is None
+    assert "resolved" not in schema_state["article"]
+
+
+def test_push_onto_existing_schema_skips_writes_on_type_mismatch(existing_component_schema):
+    assert squidex.push_schema_to_squidex(SCHEMA) is None
+    assert existing_component_schema.writes == []
+
+
+def test_matching_type_is_pushed_and_recorded(existing_component_schema):
+    existing_component_schema.existing["type"] = "Default"
+    schema_state = {}
+    sent, schema_id = push_if_changed(SCHEMA, "resolved", schema_state, {}, push=squidex.sync_schema_to_squidex)
+
+    assert schema_id == "article-id"
+    assert schema_state["article"]["resolved"] == squidex.compute_schema_hash(SCHEMA)